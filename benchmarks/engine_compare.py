@@ -0,0 +1,67 @@
+# =====================================================
+# BENCHMARK: SELENIUM VS ASYNC PLAYWRIGHT (PLACES / MINUTE)
+# =====================================================
+# Runs the same queries through fi.py's Selenium flow (search, scroll, cards,
+# tabbed place pages) and through pw_engine, and reports places per minute.
+# --max-details caps place pages per query so both engines do equal work.
+#
+#   python -m benchmarks.engine_compare "MRF tyre dealer Jaipur" "MRF showroom Kota" --pages 6
+import argparse
+import time
+
+import fi
+from pw_engine import DEFAULT_CONCURRENCY, run_queries
+
+DEFAULT_QUERIES = ["MRF tyre dealer Jaipur", "MRF tyre showroom Jodhpur"]
+
+
+def run_selenium(queries, lean, max_details):
+    driver = fi.setup_driver(lean=lean)
+    places = 0
+    start = time.perf_counter()
+    try:
+        for query in queries:
+            fi.get_business_urls(driver, query)
+            rows, urls = fi.process_cards(fi.harvest_cards(driver), query)
+            if max_details is not None:
+                urls = urls[:max_details]
+            rows += fi.process_urls(driver, urls, query)
+            places += len(rows)
+    finally:
+        driver.quit()
+    return places, time.perf_counter() - start
+
+
+def run_playwright(queries, lean, max_details, pages):
+    results, seconds = run_queries(
+        queries, fi.clean_phone, concurrency=pages, lean=lean, max_details=max_details
+    )
+    return sum(len(places) for places in results.values()), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare places/minute of the Selenium and Playwright engines.")
+    parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+    parser.add_argument("--pages", type=int, default=DEFAULT_CONCURRENCY, help="Playwright pages in flight")
+    parser.add_argument("--max-details", type=int, default=10, help="place pages per query (both engines)")
+    parser.add_argument("--full", action="store_true", help="disable lean mode")
+    args = parser.parse_args()
+    lean = not args.full
+    fi.LEAN_MODE = lean  # new detail tabs follow the same blocking as the first
+
+    rows = [
+        ("selenium", *run_selenium(args.queries, lean, args.max_details)),
+        ("playwright", *run_playwright(args.queries, lean, args.max_details, args.pages)),
+    ]
+
+    print()
+    for engine, places, seconds in rows:
+        rate = places / seconds * 60 if seconds else 0.0
+        print(f"{engine:>10} | {places:>4} places | {seconds:>7.1f}s | {rate:>6.1f} places/min")
+    (_, sel_places, sel_s), (_, pw_places, pw_s) = rows
+    if sel_places and pw_s:
+        print(f"\nPlaywright speedup: {(pw_places / pw_s) / (sel_places / sel_s):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
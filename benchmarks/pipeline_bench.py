@@ -0,0 +1,298 @@
+# =====================================================
+# BENCHMARK: OFFLINE PIPELINE SUITE (REPLAYED MAPS PAGES)
+# =====================================================
+# Runs search -> scroll -> harvest -> extract for each entry point against
+# the local replay server, so no network is needed and every run sees the
+# same pages:
+#
+#   fi          fi.py's Selenium flow (feed scroll, cards, tabbed place pages)
+#   effi        effi.py's engine: WorkScheduler worker processes
+#   playwright  pw_engine (fi.py / effi.py with the async engine)
+#
+# Per entry point it reports places/minute, WebDriver commands per place
+# (None for Playwright, which talks CDP), p50/p95 place-page load time (the
+# page's own navigation timing) and peak RSS of the whole process tree,
+# Chrome included. Results are written as JSON under benchmarks/results/,
+# named by commit, so runs can be compared. Browsers start without the
+# warm template profile, whose first build would load the live Maps site:
+#
+#   python -m benchmarks.pipeline_bench --delay 0.3
+#   python -m benchmarks.pipeline_bench --compare results/old.json results/new.json
+import argparse
+import datetime
+import glob
+import json
+import os
+import statistics
+import subprocess
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+import fi
+import place_extract
+from benchmarks.replay_server import ReplayServer
+from benchmarks.wire_meter import WireMeter
+from pw_engine import DEFAULT_CONCURRENCY, run_queries
+from work_scheduler import DEFAULT_WORKERS, WorkScheduler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(HERE, "fixtures", "sample")
+RESULTS_DIR = os.path.join(HERE, "results")
+ENTRY_POINTS = ("fi", "effi", "playwright")
+# The stand-in serves the same feed for every query, so queries only differ in name
+DEFAULT_QUERIES = ["MRF tyre dealer Jaipur", "MRF tyre showroom Jodhpur"]
+COMPARED = ("places_per_min", "commands_per_place", "p50_ms", "p95_ms", "peak_mb")
+
+
+# ================= MEASUREMENT =================
+def _tree_rss_mb(root):
+    """RSS of `root` and every descendant (chromedriver, Chrome, worker processes)."""
+    if psutil is not None:
+        try:
+            procs = [psutil.Process(root)] + psutil.Process(root).children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 2**20
+
+    # /proc/<pid>/stat: "pid (comm) state ppid ... rss(24th field, pages)"
+    parents, rss = {}, {}
+    for path in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(path) as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        pid = int(path.split("/")[2])
+        parents.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21])
+    if root not in rss:
+        return None
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(parents.get(pid, []))
+    return total * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class PeakMemory:
+    """`with PeakMemory() as peak: ...` then peak.mb (None where it cannot be measured)."""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            mb = _tree_rss_mb(os.getpid())
+            if mb is not None:
+                self.mb = max(self.mb or 0.0, mb)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return round(float(values[0]), 1)
+    return round(statistics.quantiles(values, n=100, method="inclusive")[pct - 1], 1)
+
+
+def _result(places, seconds, commands, page_ms, peak_mb, **extra):
+    return {
+        "places": places,
+        "seconds": round(seconds, 2),
+        "places_per_min": round(places / seconds * 60, 1) if seconds else 0.0,
+        "commands_per_place": round(commands / places, 2) if commands is not None and places else None,
+        "p50_ms": _percentile(page_ms, 50),
+        "p95_ms": _percentile(page_ms, 95),
+        "peak_mb": round(peak_mb, 1) if peak_mb is not None else None,
+        **extra,
+    }
+
+
+# ================= ENTRY POINTS =================
+def bench_fi(base_url, queries, lean, card_mode):
+    fi.LEAN_MODE = lean  # new detail tabs follow the same blocking as the first
+    place_extract.reset_stats()
+    stages = {"search": 0.0, "harvest": 0.0, "extract": 0.0}
+    places = 0
+    with PeakMemory() as peak:
+        start = time.perf_counter()
+        driver = fi.setup_driver(lean=lean, warm=False)
+        meter = WireMeter(driver)
+        try:
+            for query in queries:
+                t = time.perf_counter()
+                urls = fi.get_business_urls(driver, query, search_url=f"{base_url}/maps/search/{query.replace(' ', '+')}")
+                stages["search"] += time.perf_counter() - t
+
+                t = time.perf_counter()
+                rows = []
+                if card_mode:
+                    rows, urls = fi.process_cards(fi.harvest_cards(driver), query)
+                stages["harvest"] += time.perf_counter() - t
+
+                t = time.perf_counter()
+                rows += fi.process_urls(driver, urls, query)
+                stages["extract"] += time.perf_counter() - t
+                places += len(rows)
+            seconds = time.perf_counter() - start
+            commands = meter.commands
+        finally:
+            meter.detach()
+            driver.quit()
+    return _result(places, seconds, commands, list(place_extract.page_times), peak.mb,
+                   stages={name: round(s, 2) for name, s in stages.items()})
+
+
+class _KeepAll:
+    """RunSeen stand-in: the replayed feed is the same for every query, so nothing is deduplicated."""
+
+    @staticmethod
+    def claim(urls):
+        return list(urls)
+
+
+def bench_effi(base_url, queries, lean, card_mode, workers):
+    tasks = [(query, query.split()[-1], " ".join(query.split()[1:-1])) for query in queries]
+    scheduler = WorkScheduler(
+        workers=workers, lean=lean, card_mode=card_mode, max_steps=None,
+        base_url=base_url, use_cache=False, meter=True, warm=False
+    )
+    with PeakMemory() as peak:
+        start = time.perf_counter()
+        for _ in scheduler.run(tasks, _KeepAll(), queries[0].split()[0]):
+            pass
+        seconds = time.perf_counter() - start
+    # every place read, with or without a phone, as the other entry points count them
+    places = scheduler.stats["cards"] + scheduler.stats["pages"]
+    page_ms = [ms for measure in scheduler.measures for ms in measure["page_ms"]]
+    commands = sum(measure["commands"] for measure in scheduler.measures)
+    return _result(places, seconds, commands, page_ms, peak.mb, workers=workers)
+
+
+def bench_playwright(base_url, queries, lean, card_mode, pages):
+    place_extract.reset_stats()
+    with PeakMemory() as peak:
+        results, seconds = run_queries(
+            queries, fi.clean_phone, concurrency=pages, lean=lean, card_mode=card_mode, base_url=base_url
+        )
+    places = sum(len(found) for found in results.values())
+    return _result(places, seconds, None, list(place_extract.page_times), peak.mb, pages=pages)
+
+
+# ================= REPORTING =================
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=HERE, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(value, unit=""):
+    return "-" if value is None else f"{value:g}{unit}"
+
+
+def print_results(results):
+    print()
+    for entry, r in results.items():
+        print(
+            f"{entry:>10} | {r['places']:>4} places | {r['places_per_min']:>7.1f} places/min | "
+            f"{_fmt(r['commands_per_place']):>6} cmds/place | p50 {_fmt(r['p50_ms'], 'ms'):>8} | "
+            f"p95 {_fmt(r['p95_ms'], 'ms'):>8} | peak {_fmt(r['peak_mb'], ' MB')}"
+        )
+
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    for entry in new["results"]:
+        if entry not in old["results"]:
+            continue
+        print(f"\n{entry}")
+        for metric in COMPARED:
+            a, b = old["results"][entry].get(metric), new["results"][entry].get(metric)
+            change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else ""
+            print(f"   {metric:<20} {_fmt(a):>10} -> {_fmt(b):>10}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline against replayed Maps pages.")
+    parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+    parser.add_argument("--entry", nargs="+", choices=ENTRY_POINTS, default=list(ENTRY_POINTS))
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds the server adds to every page")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="effi worker processes")
+    parser.add_argument("--pages", type=int, default=DEFAULT_CONCURRENCY, help="Playwright pages in flight")
+    parser.add_argument("--full", action="store_true", help="disable lean mode")
+    parser.add_argument("--no-cards", action="store_true", help="open every place page (card mode off)")
+    parser.add_argument("--out", help="JSON file (default: benchmarks/results/<time>_<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    lean, card_mode = not args.full, not args.no_cards
+    results = {}
+    with ReplayServer(args.fixtures, delay=args.delay) as server:
+        print(f"🛰️ Replaying {args.fixtures} at {server.base_url}")
+        for entry in args.entry:
+            if entry == "fi":
+                results[entry] = bench_fi(server.base_url, args.queries, lean, card_mode)
+            elif entry == "effi":
+                results[entry] = bench_effi(server.base_url, args.queries, lean, card_mode, args.workers)
+            else:
+                results[entry] = bench_playwright(server.base_url, args.queries, lean, card_mode, args.pages)
+    print_results(results)
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    run = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "settings": {
+            "queries": args.queries, "fixtures": os.path.relpath(args.fixtures, HERE), "delay": args.delay,
+            "lean": lean, "card_mode": card_mode,
+        },
+        "results": results,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}_{commit or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"\n📄 {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# =====================================================
+# LOCAL MAPS STAND-IN SERVER
+# =====================================================
+# Serves recorded Maps payloads so the network-capture engine (and the
+# benchmarks) can run without touching Google:
+#
+#   /maps/search/<query>      stand-in results page: a div[role='feed'] that
+#                              fetches the next batch whenever it is scrolled
+#                              to the bottom and renders a.hfpxzc cards
+#   /search?tbm=map&batch=N   <fixtures>/search/batch_NNN.txt (404 = end of list)
+#   /maps/place/<name>/data=…!1s<feature id>…
+#                              stand-in place page for a recorded result: the
+#                              record embedded in APP_INITIALIZATION_STATE plus
+#                              the h1 / address / phone buttons of the DOM path
+#
+# Batches are exactly what cdp_capture.capture_search(record_dir=...) saves.
+# --delay holds every page response back to mimic network latency.
+#
+#   python -m benchmarks.replay_server benchmarks/fixtures/sample --port 8765
+import argparse
+import glob
+import html
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+
+from cdp_capture import batch_records
+from place_extract import decode_place_record
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STANDIN_SEARCH_PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Maps stand-in</title>
+<style>
+div[role='feed'] { height: 600px; overflow-y: scroll; }
+div.Nv2PK { height: 120px; border-bottom: 1px solid #ddd; }
+</style>
+</head>
+<body>
+<div role="feed"></div>
+<script>
+const feed = document.querySelector("div[role='feed']");
+let batch = 0;
+let loading = false;
+let finished = false;
+
+const decode = body => {
+    let text = body.trim();
+    if (text.endsWith('/*""*/')) text = text.slice(0, -6);
+    if (text.startsWith("{")) text = JSON.parse(text).d;
+    if (text.startsWith(")]}'")) text = text.slice(text.indexOf("\\n") + 1);
+    return JSON.parse(text);
+};
+
+const renderCard = rec => {
+    const card = document.createElement("div");
+    card.className = "Nv2PK";
+    const link = document.createElement("a");
+    link.className = "hfpxzc";
+    link.setAttribute("aria-label", rec[11]);
+    link.href = `/maps/place/${encodeURIComponent(rec[11]).replace(/%20/g, "+")}` +
+        `/data=!4m7!3m6!1s${rec[10]}!8m2!3d${rec[9][2]}!4d${rec[9][3]}`;
+    const title = document.createElement("div");
+    title.className = "qBF1Pd";
+    title.textContent = rec[11];
+    card.appendChild(link);
+    card.appendChild(title);
+    feed.appendChild(card);
+};
+
+async function loadBatch() {
+    if (loading || finished) return;
+    loading = true;
+    const res = await fetch(`/search?tbm=map&batch=${batch}`);
+    if (!res.ok) {
+        finished = true;
+        const end = document.createElement("div");
+        end.textContent = "You've reached the end of the list.";
+        feed.appendChild(end);
+    } else {
+        const payload = decode(await res.text());
+        for (const entry of (payload[0] && payload[0][1]) || []) {
+            if (entry && entry[14]) renderCard(entry[14]);
+        }
+        batch += 1;
+    }
+    loading = false;
+}
+
+feed.addEventListener("scroll", () => {
+    if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 10) loadBatch();
+});
+loadBatch();
+</script>
+</body>
+</html>
+"""
+
+
+STANDIN_PLACE_PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script>window.APP_INITIALIZATION_STATE = {state};</script>
+</head>
+<body>
+<h1>{title}</h1>
+<button data-item-id="address" aria-label="Address: {address}">{address}</button>
+<button data-item-id="phone:tel:{phone}" aria-label="Phone: {phone}">{phone}</button>
+</body>
+</html>
+"""
+
+FEATURE_ID_PATTERN = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)")
+
+
+def load_records(fixtures_dir):
+    """feature id -> raw place record, from every recorded search batch."""
+    records = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "search", "batch_*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for record in batch_records(f.read()):
+                place = decode_place_record(record)
+                if place and place["feature_id"]:
+                    records[place["feature_id"]] = record
+    return records
+
+
+def place_page(record):
+    app_state = [None, None, None, [")]}'\n" + json.dumps([None] * 6 + [record])]]
+    phone = record[178][0][0] if len(record) > 178 and record[178] else ""
+    return STANDIN_PLACE_PAGE.format(
+        title=html.escape(record[11]),
+        state=json.dumps(app_state).replace("</", "<\\/"),
+        address=html.escape(record[39] if len(record) > 39 and record[39] else ""),
+        phone=html.escape(phone),
+    )
+
+
+def _make_handler(fixtures_dir, delay):
+    records = load_records(fixtures_dir)
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urllib.parse.urlparse(self.path)
+            if delay and parsed.path.startswith("/maps/"):
+                time.sleep(delay)
+            if parsed.path.startswith("/maps/search/"):
+                self._send(200, STANDIN_SEARCH_PAGE, "text/html; charset=utf-8")
+            elif parsed.path.startswith("/maps/place/"):
+                match = FEATURE_ID_PATTERN.search(urllib.parse.unquote(parsed.path))
+                record = records.get(match.group(1)) if match else None
+                if record is None:
+                    self._send(404, "not recorded", "text/plain")
+                else:
+                    self._send(200, place_page(record), "text/html; charset=utf-8")
+            elif parsed.path == "/search":
+                params = urllib.parse.parse_qs(parsed.query)
+                batch = int(params.get("batch", ["0"])[0])
+                self._send_file(os.path.join(fixtures_dir, "search", f"batch_{batch:03d}.txt"), "application/json")
+            else:
+                self._send(404, "not recorded", "text/plain")
+
+        def _send_file(self, path, content_type):
+            if not os.path.exists(path):
+                self._send(404, "not recorded", "text/plain")
+                return
+            with open(path, "r", encoding="utf-8") as f:
+                self._send(200, f.read(), content_type)
+
+        def _send(self, status, body, content_type):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # keep benchmark output clean
+
+    return ReplayHandler
+
+
+class ReplayServer:
+    """Runs the stand-in in a background thread: `with ReplayServer(dir) as server: server.base_url`."""
+
+    def __init__(self, fixtures_dir, port=0, delay=0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(fixtures_dir, delay))
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded Google Maps payloads locally.")
+    parser.add_argument("fixtures_dir")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to every page response")
+    args = parser.parse_args()
+
+    with ReplayServer(args.fixtures_dir, args.port, args.delay) as server:
+        print(f"🛰️ Replaying {args.fixtures_dir} at {server.base_url}/maps/search/<query> (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# =====================================================
+# BENCHMARK: SCROLL LOOP WIRE TRAFFIC (BEFORE / AFTER)
+# =====================================================
+# Runs the same searches twice: once with the old scroll loop (scrollHeight
+# reads + driver.page_source + find_elements count per step) and once with
+# feed_scroll.scroll_feed (one probe per step), and reports WebDriver
+# commands and bytes transferred per query.
+#
+#   python -m benchmarks.scroll_payload "MRF tyre dealer Jaipur" "MRF showroom Kota"
+import json
+import sys
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from benchmarks.wire_meter import WireMeter
+from feed_scroll import END_OF_LIST_TEXT, scroll_feed
+from fi import setup_driver
+
+DEFAULT_QUERIES = ["MRF tyre dealer Jaipur", "MRF tyre showroom Jodhpur"]
+
+
+def legacy_scroll(driver, feed):
+    """The scroll loop as it was before feed_scroll (StableV1 flavour, with its per-step count)."""
+    last_height = driver.execute_script("return arguments[0].scrollHeight", feed)
+    while True:
+        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed)
+        time.sleep(2)
+        new_height = driver.execute_script("return arguments[0].scrollHeight", feed)
+        if END_OF_LIST_TEXT in driver.page_source or new_height == last_height:
+            break
+        last_height = new_height
+        len(driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc"))
+
+
+def open_feed(driver, query):
+    driver.get(f"https://www.google.com/maps/search/{query.replace(' ', '+')}")
+    return WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
+
+
+def measure(driver, meter, query, mode):
+    feed = open_feed(driver, query)
+    meter.reset()
+    start = time.perf_counter()
+    if mode == "legacy":
+        legacy_scroll(driver, feed)
+    else:
+        scroll_feed(driver, feed)
+    seconds = time.perf_counter() - start
+    cards = len(driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc"))
+    wire = meter.snapshot()
+    return {
+        "query": query,
+        "mode": mode,
+        "seconds": round(seconds, 2),
+        "cards": cards,
+        "commands": wire["commands"],
+        "bytes": wire["bytes_sent"] + wire["bytes_received"],
+    }
+
+
+def main():
+    queries = sys.argv[1:] or DEFAULT_QUERIES
+    driver = setup_driver()
+    meter = WireMeter(driver)
+    rows = []
+    try:
+        for query in queries:
+            for mode in ("legacy", "probe"):
+                row = measure(driver, meter, query, mode)
+                rows.append(row)
+                print(
+                    f"{mode:>6} | {query:<35} | {row['cards']:>4} cards | "
+                    f"{row['commands']:>4} cmds | {row['bytes'] / 1024:>9.1f} KiB | {row['seconds']:>6.1f}s"
+                )
+    finally:
+        meter.detach()
+        driver.quit()
+
+    for mode in ("legacy", "probe"):
+        mode_rows = [r for r in rows if r["mode"] == mode]
+        avg_bytes = sum(r["bytes"] for r in mode_rows) / len(mode_rows)
+        print(f"📦 {mode}: {avg_bytes / 1024:.1f} KiB per query on average")
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
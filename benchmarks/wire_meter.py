@@ -0,0 +1,40 @@
+# =====================================================
+# WEBDRIVER WIRE METER
+# =====================================================
+# Wraps driver.execute so every WebDriver command is counted together with
+# the size of its request and response payloads (as serialized JSON, which
+# is what travels between the Python client and chromedriver).
+import json
+
+
+class WireMeter:
+    def __init__(self, driver):
+        self.driver = driver
+        self._original_execute = driver.execute
+        self.reset()
+        driver.execute = self._execute
+
+    def _execute(self, driver_command, params=None):
+        response = self._original_execute(driver_command, params)
+        self.commands += 1
+        self.bytes_sent += len(json.dumps(params or {}, default=str))
+        self.bytes_received += len(json.dumps(response.get("value") if response else None, default=str))
+        self.by_command[driver_command] = self.by_command.get(driver_command, 0) + 1
+        return response
+
+    def reset(self):
+        self.commands = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.by_command = {}
+
+    def snapshot(self):
+        return {
+            "commands": self.commands,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "by_command": dict(self.by_command),
+        }
+
+    def detach(self):
+        self.driver.execute = self._original_execute
@@ -0,0 +1,161 @@
+# =====================================================
+# NETWORK-CAPTURE SEARCH ENGINE (CHROME DEVTOOLS PROTOCOL)
+# =====================================================
+# Instead of scraping a.hfpxzc anchors, this engine reads the result batches
+# Maps fetches while the feed paginates (/search?tbm=map...). Chrome's
+# performance log reports the responses, Network.getResponseBody fetches
+# them, and every entry is decoded with the same record layout as the
+# embedded place data. Cards the feed has virtualized away are still
+# captured, because we never read them from the DOM.
+#
+# The feed is still scrolled, but only to make Maps request the next page.
+import json
+import os
+import urllib.parse
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from feed_scroll import scroll_feed
+from place_extract import decode_place_record
+
+MAPS_BASE_URL = "https://www.google.com"
+
+# The first batch is server-rendered into the search page itself
+INITIAL_BATCHES_JS = """
+const state = window.APP_INITIALIZATION_STATE;
+if (!state || !Array.isArray(state[3])) return [];
+return state[3].filter(part => typeof part === "string" && part.startsWith(")]}'"));
+"""
+
+
+def enable_network_capture(options):
+    """Must be applied in setup_driver() for drivers used with this engine."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def is_search_batch(url):
+    parsed = urllib.parse.urlparse(url)
+    return parsed.path == "/search" and "tbm=map" in parsed.query
+
+
+# ================= PARSING =================
+def place_url(record, base_url=MAPS_BASE_URL):
+    """Rebuilds the /maps/place/…/data= link a result card would carry."""
+    name = urllib.parse.quote_plus(record["name"])
+    if record.get("feature_id"):
+        return (
+            f"{base_url}/maps/place/{name}/data=!4m7!3m6!1s{record['feature_id']}"
+            f"!8m2!3d{record['lat']}!4d{record['lng']}"
+        )
+    return f"{base_url}/maps/place/{name}/@{record['lat']},{record['lng']},17z"
+
+
+def batch_records(body):
+    """Raw place records of one /search?tbm=map response; [] for anything else."""
+    text = body.strip()
+    if text.endswith('/*""*/'):
+        text = text[:-6]
+    try:
+        if text.startswith("{"):
+            text = json.loads(text).get("d", "")
+        if text.startswith(")]}'"):
+            text = text[text.find("\n") + 1:]
+        payload = json.loads(text)
+    except (ValueError, AttributeError):
+        return []
+
+    entries = payload[0][1] if (
+        isinstance(payload, list) and payload and isinstance(payload[0], list)
+        and len(payload[0]) > 1 and isinstance(payload[0][1], list)
+    ) else []
+
+    return [entry[14] for entry in entries if isinstance(entry, list) and len(entry) > 14]
+
+
+def parse_search_body(body, base_url=MAPS_BASE_URL):
+    """
+    Decodes one /search?tbm=map response (or the embedded first batch) into
+    place records. Returns [] for anything that is not a result batch.
+    """
+    places = []
+    for record in batch_records(body):
+        place = decode_place_record(record)
+        if place:
+            place["url"] = place_url(place, base_url)
+            place["source"] = "network"
+            places.append(place)
+    return places
+
+
+# ================= CAPTURE =================
+class NetworkCapture:
+    """Collects finished search-batch responses from Chrome's performance log."""
+
+    def __init__(self, driver, record_dir=None):
+        self.driver = driver
+        self.record_dir = record_dir
+        self.bodies = []
+        self._pending = {}
+        self._recorded = 0
+
+    def drain(self):
+        """Throws away log entries from before the current search."""
+        self.driver.get_log("performance")
+        self._pending.clear()
+
+    def poll(self):
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method")
+            params = message.get("params", {})
+
+            if method == "Network.responseReceived" and is_search_batch(params["response"]["url"]):
+                self._pending[params["requestId"]] = params["response"]["url"]
+            elif method == "Network.loadingFinished" and params.get("requestId") in self._pending:
+                request_id = params["requestId"]
+                del self._pending[request_id]
+                try:
+                    body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                except Exception:
+                    continue  # evicted from Chrome's buffer
+                self._keep(body["body"])
+
+    def _keep(self, body):
+        self.bodies.append(body)
+        if self.record_dir:
+            batch_dir = os.path.join(self.record_dir, "search")
+            os.makedirs(batch_dir, exist_ok=True)
+            with open(os.path.join(batch_dir, f"batch_{self._recorded:03d}.txt"), "w", encoding="utf-8") as f:
+                f.write(body)
+            self._recorded += 1
+
+
+def capture_search(driver, query, base_url=MAPS_BASE_URL, record_dir=None, max_steps=None):
+    """
+    Runs one search and returns its places (deduplicated by URL), decoded from
+    the network. Each place has url, name, phone (raw), address, lat, lng,
+    website, category, feature_id and source="network".
+    record_dir saves the raw batches so the replay server can serve them later.
+    """
+    capture = NetworkCapture(driver, record_dir)
+    capture.drain()
+    driver.get(f"{base_url}/maps/search/{query.replace(' ', '+')}")
+
+    try:
+        feed = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
+    except Exception:
+        return []
+
+    bodies = list(driver.execute_script(INITIAL_BATCHES_JS) or [])
+    scroll_feed(driver, feed, max_steps=max_steps, on_step=lambda probe: capture.poll())
+    capture.poll()
+    bodies.extend(capture.bodies)
+
+    places = {}
+    for body in bodies:
+        for place in parse_search_body(body, base_url):
+            places.setdefault(place["url"], place)
+    return list(places.values())
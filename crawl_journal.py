@@ -0,0 +1,138 @@
+# =====================================================
+# CRASH-SAFE CRAWL JOURNAL
+# =====================================================
+# Results used to live only in memory until a run finished. The journal is
+# an append-only JSONL file per job (business + cities + keywords) that
+# records every finished (city, keyword) pair and every extracted place as
+# the run goes. Restarting the same job replays it: finished queries are
+# skipped, known places are not loaded again and saved leads come back.
+#
+# The scraping loop only puts records on a queue; a background thread
+# appends them and flushes/fsyncs in small batches, so a crash loses at
+# most the last FLUSH_INTERVAL seconds and the hot loop never waits on disk.
+# A torn last line (crash mid-write) is skipped on replay.
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+from driver_bootstrap import BOOTSTRAP_DIR
+from place_ids import canonical_place_id
+
+JOURNAL_DIR = os.path.join(BOOTSTRAP_DIR, "journals")
+FLUSH_INTERVAL = 0.5  # seconds between fsyncs while records are arriving
+
+
+def job_key(business_name, cities, keywords):
+    """Same business, cities and keywords (any order, any case) = same job."""
+    parts = [
+        business_name.strip().lower(),
+        sorted(c.strip().lower() for c in cities),
+        sorted(k.strip().lower() for k in keywords),
+    ]
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlJournal:
+    """
+    journal = CrawlJournal(job_key(...))
+    journal.leads / journal.place_ids / journal.is_query_done(city, keyword)
+    journal.record_place(url, lead)   # lead=None for places without a usable phone
+                                      # (duplicates are journaled too; LeadIndex merges on replay)
+    journal.record_query(city, keyword)
+    journal.close()
+    """
+
+    def __init__(self, key, directory=JOURNAL_DIR, resume=True):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{key}.jsonl")
+        if not resume and os.path.exists(self.path):
+            os.remove(self.path)
+
+        self.leads = []
+        self.place_ids = set()
+        self._done_queries = set()
+        self.replayed = self._replay()
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="crawl-journal", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ================= REPLAY =================
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return 0
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                count += 1
+                if entry["t"] == "query":
+                    self._done_queries.add((entry["city"], entry["keyword"]))
+                elif entry["t"] == "place":
+                    self.place_ids.add(entry["id"])
+                    if entry.get("lead"):
+                        self.leads.append(entry["lead"])
+        return count
+
+    def is_query_done(self, city, keyword):
+        return (city, keyword) in self._done_queries
+
+    # ================= RECORDING =================
+    def record_place(self, url, lead=None):
+        place_id = canonical_place_id(url)
+        self.place_ids.add(place_id)
+        self._queue.put({"t": "place", "id": place_id, "url": url, "lead": lead})
+
+    def record_query(self, city, keyword):
+        self._done_queries.add((city, keyword))
+        self._queue.put({"t": "query", "city": city, "keyword": keyword})
+
+    def _write_loop(self):
+        with open(self.path, "a+b") as f:
+            # Terminate a torn last line so the first new record stays parseable
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                batch = [entry]
+                deadline = time.monotonic() + FLUSH_INTERVAL
+                while time.monotonic() < deadline:
+                    try:
+                        entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if entry is None:
+                        self._queue.put(None)  # stop after this batch
+                        break
+                    batch.append(entry)
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self):
+        """Writes everything still queued, then stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def summary(self):
+        return (
+            f"📓 Journal: {len(self._done_queries)} queries done, {len(self.place_ids)} places, "
+            f"{len(self.leads)} lead sightings replayed ({os.path.basename(self.path)})"
+        )
@@ -0,0 +1,228 @@
+# =====================================================
+# CHROME BOOTSTRAP – PINNED DRIVER PATH + WARM PROFILE
+# =====================================================
+# ChromeDriverManager().install() probes versions and the filesystem on
+# every call. Here it runs once per host: the resolved chromedriver path is
+# pinned in a small JSON cache file, and a template Chrome profile is built
+# once so every later browser starts from a copy with warm caches.
+import atexit
+import contextlib
+import copy
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+# ================= CONFIG =================
+BOOTSTRAP_DIR = os.path.join(os.path.expanduser("~"), ".wellsure_scraper")
+CACHE_FILE = os.path.join(BOOTSTRAP_DIR, "chromedriver_cache.json")
+TEMPLATE_PROFILE_DIR = os.path.join(BOOTSTRAP_DIR, "profile_template")
+TEMPLATE_LOCK_FILE = TEMPLATE_PROFILE_DIR + ".lock"
+WARMUP_URL = "https://www.google.com/maps"
+
+# Chrome refuses to open a profile that still carries these from another process
+PROFILE_LOCK_FILES = ("SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile")
+
+_lock = threading.Lock()
+_template_lock = threading.Lock()
+_driver_path = None
+_template_ready = False
+_profile_copies = []
+
+startup_times = {"cold": [], "warm": []}
+
+
+# ================= DRIVER BINARY =================
+def _read_cache():
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache):
+    os.makedirs(BOOTSTRAP_DIR, exist_ok=True)
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, CACHE_FILE)
+
+
+def resolve_chromedriver_path(refresh=False):
+    """Returns the chromedriver path, asking webdriver-manager at most once per host."""
+    global _driver_path
+    with _lock:
+        if _driver_path and not refresh:
+            return _driver_path
+
+        host = socket.gethostname()
+        cache = _read_cache()
+        path = None if refresh else cache.get(host)
+
+        if not path or not os.path.exists(path):
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            cache[host] = path
+            _write_cache(cache)
+
+        _driver_path = path
+        return path
+
+
+# ================= WARM PROFILE =================
+@contextlib.contextmanager
+def _host_lock(path):
+    """Exclusive lock on `path` across processes (scheduler workers, the job service, the apps)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s: keep waiting
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _ensure_template_profile(options):
+    """Builds the template profile once per host by loading Maps in a throwaway session."""
+    global _template_ready
+    with _template_lock:
+        if _template_ready:
+            return
+        with _host_lock(TEMPLATE_LOCK_FILE):
+            # Another process may have built it while we waited for the lock
+            if os.path.isdir(TEMPLATE_PROFILE_DIR):
+                _template_ready = True
+                return
+            _build_template_profile(options)
+            _template_ready = True
+
+
+def _build_template_profile(options):
+    # Build next to the final location and rename, so a crash mid-build
+    # never leaves a half-written template behind
+    building_dir = f"{TEMPLATE_PROFILE_DIR}.building-{os.getpid()}"
+    shutil.rmtree(building_dir, ignore_errors=True)
+    template_options = copy.deepcopy(options)
+    template_options.add_argument(f"--user-data-dir={building_dir}")
+
+    try:
+        start = time.perf_counter()
+        driver = _start_chrome(template_options)
+        startup_times["cold"].append(time.perf_counter() - start)
+        try:
+            driver.get(WARMUP_URL)
+            time.sleep(3)  # let the Maps bundle land in the HTTP cache
+        finally:
+            driver.quit()
+        os.replace(building_dir, TEMPLATE_PROFILE_DIR)
+    except OSError:
+        # The template appeared anyway (a process not using the lock): keep that one
+        if not os.path.isdir(TEMPLATE_PROFILE_DIR):
+            raise
+    finally:
+        shutil.rmtree(building_dir, ignore_errors=True)
+
+
+def _copy_template_profile():
+    target = tempfile.mkdtemp(prefix="wellsure_chrome_")
+    shutil.copytree(
+        TEMPLATE_PROFILE_DIR, target, dirs_exist_ok=True,
+        ignore=shutil.ignore_patterns(*PROFILE_LOCK_FILES)
+    )
+    with _lock:
+        _profile_copies.append(target)
+    return target
+
+
+def _remove_profile_copy(path):
+    shutil.rmtree(path, ignore_errors=True)
+    with _lock:
+        if path in _profile_copies:
+            _profile_copies.remove(path)
+
+
+def _remove_copy_on_quit(driver, path):
+    """Deletes the driver's profile copy once Chrome has exited, not only at interpreter exit."""
+    quit_driver = driver.quit
+
+    def quit():
+        try:
+            quit_driver()
+        finally:
+            _remove_profile_copy(path)
+
+    driver.quit = quit
+    return driver
+
+
+@atexit.register
+def _cleanup_profile_copies():
+    for path in list(_profile_copies):
+        _remove_profile_copy(path)
+
+
+# ================= LAUNCH =================
+def _start_chrome(options):
+    try:
+        return webdriver.Chrome(service=Service(resolve_chromedriver_path()), options=options)
+    except Exception:
+        # Chrome auto-updated past the pinned driver: resolve again once
+        return webdriver.Chrome(service=Service(resolve_chromedriver_path(refresh=True)), options=options)
+
+
+def launch_chrome(options, warm=True):
+    """
+    Drop-in replacement for webdriver.Chrome(service=..., options=...).
+    With warm=True the browser starts from a private copy of the template profile.
+    """
+    if not warm:
+        start = time.perf_counter()
+        driver = _start_chrome(options)
+        startup_times["cold"].append(time.perf_counter() - start)
+        return driver
+
+    _ensure_template_profile(options)
+    start = time.perf_counter()
+    profile = _copy_template_profile()
+    options.add_argument(f"--user-data-dir={profile}")
+    try:
+        driver = _start_chrome(options)
+    except Exception:
+        _remove_profile_copy(profile)
+        raise
+    startup_times["warm"].append(time.perf_counter() - start)
+    return _remove_copy_on_quit(driver, profile)
+
+
+def startup_summary():
+    def fmt(label, times):
+        if not times:
+            return f"{label} -"
+        return f"{label} {sum(times) / len(times):.1f}s avg ({len(times)})"
+    return f"🚀 Chrome startup: {fmt('cold', startup_times['cold'])} | {fmt('warm', startup_times['warm'])}"
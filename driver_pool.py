@@ -0,0 +1,154 @@
+# =====================================================
+# SHARED CHROME DRIVER POOL
+# =====================================================
+# Launching Chrome is the most expensive thing the scrapers do, so every
+# entry point leases a warm browser from here instead of calling
+# setup_driver() per query. Drivers are health-checked on checkout and
+# scrubbed (extra tabs, cookies) on return.
+import atexit
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from run_metrics import metrics
+
+
+class DriverPool:
+    def __init__(self, factory, max_size=4, reset_cookies=True):
+        """
+        factory: zero-argument callable returning a new webdriver
+                 (each script passes its own setup_driver).
+        max_size: hard cap on browsers alive at the same time.
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.reset_cookies = reset_cookies
+
+        self._idle = queue.LifoQueue()  # LIFO: hand out the most recently used (warmest) browser
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._drivers = set()
+        self._closed = False
+
+        self.stats = {
+            "leases": 0,
+            "launches": 0,
+            "replaced": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+        atexit.register(self.close)
+
+    # ================= LEASING =================
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Borrow a driver for the duration of a `with` block.
+        Blocks while `max_size` drivers are already leased out.
+        """
+        start = time.perf_counter()
+        if timeout is None:
+            self._slots.acquire()
+        elif not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No driver free after {timeout}s (pool size {self.max_size})")
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self.stats["leases"] += 1
+            self.stats["wait_total"] += waited
+            self.stats["wait_max"] = max(self.stats["wait_max"], waited)
+
+        driver = None
+        try:
+            driver = self._checkout()
+            yield driver
+        finally:
+            if driver is not None:
+                self._checkin(driver)
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return self._launch()
+
+            if self._is_healthy(driver):
+                return driver
+
+            # Dead or hung browser: throw it away and try the next one
+            self._discard(driver)
+            with self._lock:
+                self.stats["replaced"] += 1
+
+    def _checkin(self, driver):
+        if self._closed or not self._reset(driver):
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def _launch(self):
+        with metrics.stage("driver_startup"):
+            driver = self.factory()
+        with self._lock:
+            self._drivers.add(driver)
+            self.stats["launches"] += 1
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._drivers.discard(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    # ================= HEALTH / RESET =================
+    def _is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Leave the browser as a fresh single tab so the next lease starts clean."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            if self.reset_cookies:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    # ================= REPORTING / SHUTDOWN =================
+    def summary(self):
+        s = self.stats
+        avg_wait = s["wait_total"] / s["leases"] if s["leases"] else 0.0
+        return (
+            f"🧰 Driver pool: {s['leases']} leases, {s['launches']} launches, "
+            f"{s['replaced']} replaced | lease wait avg {avg_wait:.2f}s, max {s['wait_max']:.2f}s"
+        )
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            drivers = list(self._drivers)
+            self._drivers.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
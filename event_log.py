@@ -0,0 +1,175 @@
+# =====================================================
+# BOUNDED STRUCTURED EVENT LOG
+# =====================================================
+# Log lines used to be plain strings in lists that grew for the whole run,
+# and every line re-rendered the log panel. An event here is a small dict
+# (time, level, message, plus stage / query / place / duration when known):
+#
+#   ring buffer  - the last `capacity` events, all the UI ever shows
+#   JSONL sink   - every event, for post-mortems; a background thread
+#                  writes in batches, so logging never waits on disk
+#   LogPanel     - redraws a Streamlit placeholder at most once per
+#                  MIN_INTERVAL seconds (a fifth of that for warnings and errors)
+#
+#   events = EventLog(path=log_path("effi"))
+#   events.log("🔎 Searching", stage="search", query=query)
+#   events.log("Search failed", level="warning", query=query)
+#   events.close()
+import atexit
+import collections
+import datetime
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+from driver_bootstrap import BOOTSTRAP_DIR
+
+LOG_DIR = os.path.join(BOOTSTRAP_DIR, "logs")
+CAPACITY = 500        # events kept in memory for the UI
+FLUSH_INTERVAL = 1.0  # seconds of events the file sink batches into one write
+MIN_INTERVAL = 1.0    # seconds between log panel redraws
+FIELDS = ("stage", "query", "place", "duration")
+LEVELS = ("debug", "info", "warning", "error")
+
+
+def log_path(label):
+    """LOG_DIR/<label>-<time>.jsonl for a new run."""
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(LOG_DIR, f"{label}-{stamp}.jsonl")
+
+
+def make_event(msg, level="info", **fields):
+    event = {"ts": round(time.time(), 3), "level": level, "msg": msg}
+    for name in FIELDS:
+        if fields.get(name) is not None:
+            event[name] = round(fields[name], 3) if name == "duration" else fields[name]
+    return event
+
+
+def format_event(event):
+    return f"{time.strftime('%H:%M:%S', time.localtime(event['ts']))} {event['msg']}"
+
+
+class JsonlSink:
+    """Appends events to a JSONL file from a background thread, FLUSH_INTERVAL per batch."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.written = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="event-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def put(self, event):
+        self._queue.put(event)
+
+    def _write_loop(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                event = self._queue.get()
+                if event is None:
+                    break
+                batch = [event]
+                deadline = time.monotonic() + FLUSH_INTERVAL
+                while time.monotonic() < deadline:
+                    try:
+                        event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        self._queue.put(None)  # stop after this batch
+                        break
+                    batch.append(event)
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch))
+                f.flush()
+                self.written += len(batch)
+
+    def close(self):
+        """Writes everything still queued, then stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+
+class EventLog:
+    """Ring buffer of the latest events, optionally mirrored in full to a JSONL file."""
+
+    def __init__(self, capacity=CAPACITY, path=None):
+        self.events = collections.deque(maxlen=capacity)
+        self.sink = JsonlSink(path) if path else None
+        self.total = 0
+        self.counts = dict.fromkeys(LEVELS, 0)
+        self._lock = threading.Lock()
+
+    def log(self, msg, level="info", **fields):
+        event = make_event(msg, level, **fields)
+        self.add(event)
+        return event
+
+    def add(self, event):
+        """Takes an event built elsewhere (another process's make_event)."""
+        with self._lock:
+            self.events.append(event)
+            self.total += 1
+            self.counts[event["level"]] = self.counts.get(event["level"], 0) + 1
+        if self.sink:
+            self.sink.put(event)
+
+    def tail(self, n=20):
+        with self._lock:
+            return list(itertools.islice(reversed(self.events), n))[::-1]
+
+    def text(self, n=20):
+        return "\n".join(format_event(event) for event in self.tail(n))
+
+    def close(self):
+        if self.sink:
+            self.sink.close()
+
+    def summary(self):
+        problems = f"{self.counts['warning']} warnings, {self.counts['error']} errors"
+        where = f" -> {self.sink.path}" if self.sink else ""
+        return f"🧾 Log: {self.total} events ({problems}){where}"
+
+
+class LogPanel:
+    """
+    panel = LogPanel(log_placeholder, events, lines=20)
+    panel.notify()   # after logging; redraws only when the budget allows
+    panel.flush()    # end of run
+    """
+
+    def __init__(self, placeholder, events, lines=20, min_interval=MIN_INTERVAL):
+        self.placeholder = placeholder
+        self.events = events
+        self.lines = lines
+        self.min_interval = min_interval
+        self._rendered = 0
+        self._last = 0.0
+
+    def notify(self, force=False):
+        if self.events.total == self._rendered and not force:
+            return
+        since = time.monotonic() - self._last
+        if not force and since < self.min_interval:
+            # warnings and errors may jump the queue, at a fifth of the interval
+            if since < self.min_interval / 5 or not self._has_new_problem():
+                return
+        self.placeholder.code(self.events.text(self.lines), language="text")
+        self._rendered = self.events.total
+        self._last = time.monotonic()
+
+    def flush(self):
+        self.notify(force=True)
+
+    def _has_new_problem(self):
+        new = self.events.total - self._rendered
+        return any(event["level"] in ("warning", "error") for event in self.events.tail(min(new, self.lines)))
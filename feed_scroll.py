@@ -0,0 +1,85 @@
+# =====================================================
+# EVENT-DRIVEN RESULTS FEED SCROLLING
+# =====================================================
+# Instead of sleeping a fixed 2-3.5 s after every scroll, each step installs
+# a MutationObserver on div[role='feed'] and returns the moment Maps appends
+# new cards (or shows the end-of-list marker). STEP_TIMEOUT is only the
+# ceiling for a step where nothing arrives.
+import time
+
+from run_metrics import metrics
+
+END_OF_LIST_TEXT = "You've reached the end of the list"
+STEP_TIMEOUT = 8  # seconds to wait for a new batch before calling the feed exhausted
+
+# One probe per scroll step: scrolls, waits in-page until new cards arrive,
+# the end marker shows up or the timeout passes, then reports everything the
+# loop needs in a single tiny payload. This replaces pulling the whole
+# multi-megabyte driver.page_source just to look for the end marker.
+PROBE_JS = """
+const feed = arguments[0];
+const timeoutMs = arguments[1];
+const endText = arguments[2];
+const done = arguments[arguments.length - 1];
+const before = feed.children.length;
+const heightBefore = feed.scrollHeight;
+
+let finished = false;
+let observer = null;
+let timer = null;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    done({
+        end: feed.textContent.includes(endText),
+        heightBefore: heightBefore,
+        height: feed.scrollHeight,
+        cards: feed.querySelectorAll("a.hfpxzc").length
+    });
+};
+
+observer = new MutationObserver(() => {
+    if (feed.children.length > before || feed.textContent.includes(endText)) finish();
+});
+observer.observe(feed, {childList: true, subtree: true});
+timer = setTimeout(finish, timeoutMs);
+
+feed.scrollTop = feed.scrollHeight;
+"""
+
+
+def scroll_feed(driver, feed, max_steps=None, step_timeout=STEP_TIMEOUT, on_step=None):
+    """
+    Scrolls the results feed until it stops growing or Maps shows the end marker.
+    Costs exactly one WebDriver command per step.
+    on_step(probe) is called after every step that loaded more cards; probe is
+    {"end": bool, "heightBefore": int, "height": int, "cards": int}.
+    Returns {"steps": int, "seconds": float, "cards": int} for the per-query metrics.
+    """
+    # The probe waits in-page for up to step_timeout; the driver's own script
+    # timeout is raised for the scroll only and put back afterwards
+    previous_timeout = driver.timeouts.script
+    driver.set_script_timeout(step_timeout + 5)
+    start = time.perf_counter()
+    steps = 0
+    cards = 0
+
+    try:
+        while max_steps is None or steps < max_steps:
+            steps += 1
+            with metrics.stage("scroll_step"):
+                probe = driver.execute_async_script(PROBE_JS, feed, int(step_timeout * 1000), END_OF_LIST_TEXT)
+            cards = probe["cards"]
+
+            # The observer already waited up to step_timeout, so no second nudge is needed
+            if probe["end"] or probe["height"] == probe["heightBefore"]:
+                break
+
+            if on_step:
+                on_step(probe)
+    finally:
+        driver.set_script_timeout(previous_timeout)
+
+    return {"steps": steps, "seconds": time.perf_counter() - start, "cards": cards}
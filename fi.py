@@ -1,188 +1,294 @@
 # =====================================================
 # GOOGLE MAPS DISTRIBUTOR SCRAPER – ROBUST VERSION
 # =====================================================
-import time
-import re
-import os
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+from driver_bootstrap import launch_chrome, startup_summary
+from driver_pool import DriverPool
+from cdp_capture import MAPS_BASE_URL, capture_search, enable_network_capture
+from feed_scroll import scroll_feed
+from geo_tiles import tiled_search
+from lead_index import clean_phone
+from lean_profile import apply_lean_options, enable_lean_blocking, lean_report
+from place_cache import PlaceCache
+from place_extract import extraction_summary, harvest_cards, page_stats, partition_cards
+from place_ids import RunSeen, plan_queries
+from pw_engine import run_queries
+from result_sink import ResultSink, sink_path
+from run_metrics import metrics, stage_summary, write_run
+from tab_pipeline import extract_in_tabs
 
 # ================= USER INPUT =================
 BUSINESS_NAME = "MRF"
 STATE_NAME = "Rajasthan"
 OUTPUT_FILE = f"{BUSINESS_NAME}_Distributors_{STATE_NAME}.xlsx"
+# Batches stream into this SQLite file during the run; OUTPUT_FILE is written
+# from it at the end (or any time with `python result_sink.py <file>`)
+SINK_FILE = sink_path(OUTPUT_FILE)
 
 # Combine these for your searches
 CITIES = ["Jodhpur", "Jaipur", "Udaipur", "Kota"]
 KEYWORDS = ["authorized dealer", "tyre distributor", "tyre showroom"]
 
+# Card mode: take leads straight from the results feed when the card shows
+# a phone, and only open place pages for the rest
+CARD_MODE = True
+
+# "dom": scroll the feed and harvest a.hfpxzc anchors
+# "cdp": decode the result batches Maps fetches over the network (DevTools Protocol)
+SEARCH_ENGINE = "dom"
+
+# Lean mode: block images, map tiles, fonts and media in the browser
+LEAN_MODE = True
+
+# Place pages loading side by side in tabs of the same browser (1 = one at a time)
+DETAIL_TABS = 4
+
+# "selenium": the flow below, one page at a time per browser
+# "playwright": async engine, PLAYWRIGHT_PAGES searches/place pages in flight at once
+BROWSER_ENGINE = "selenium"
+PLAYWRIGHT_PAGES = 6
+
+# Place cache: places scraped within CACHE_TTL_DAYS are served from disk
+# instead of being opened again. FORCE_REFRESH re-fetches everything.
+CACHE_TTL_DAYS = 30
+FORCE_REFRESH = False
+
+# Tiled search: split each city into map tiles (finer where Maps caps the
+# results at ~120) instead of one search per city. Cities come from gazetteer.json.
+TILED_SEARCH = False
+
 # ================= SETUP DRIVER =================
-def setup_driver():
+def setup_driver(lean=False, warm=True):
     options = Options()
     # Mask automation to prevent immediate blocking
     options.add_argument("--disable-blink-features=AutomationControlled") 
     options.add_argument("--start-maximized")
     options.add_argument("--log-level=3")
-    return webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
-
-# ================= EXTRACTION LOGIC =================
-def extract_phone(driver):
-    """
-    Tries multiple methods to find the phone number on the details page.
-    """
-    try:
-        # Method 1: Look for the specific button with 'phone' icon or aria-label
-        # This XPATH looks for any button that has a phone icon or 'phone' in the label
-        phone_btn = driver.find_element(By.XPATH, "//button[contains(@aria-label, 'Phone:')]")
-        return phone_btn.get_attribute("aria-label").replace("Phone:", "").strip()
-    except:
-        pass
-
-    try:
-        # Method 2: The classic class search (Io6YTe) inside a specific container
-        # We look for the element that contains text starting with +91 or 0
-        elements = driver.find_elements(By.CLASS_NAME, "Io6YTe")
-        for el in elements:
-            text = el.text.strip()
-            # Simple check if it looks like a phone number
-            if re.match(r'^(\+91|0)?[ -]?\d{3,}', text):
-                return text
-    except:
-        pass
-    
-    return "Not Found"
-
-def extract_name(driver):
-    try:
-        return driver.find_element(By.TAG_NAME, "h1").text
-    except:
-        return ""
+    if SEARCH_ENGINE == "cdp":
+        enable_network_capture(options)
+    if lean:
+        apply_lean_options(options)
+    driver = launch_chrome(options, warm=warm)
+    if lean:
+        enable_lean_blocking(driver)
+    return driver
 
 # ================= CORE LOGIC =================
-def get_business_urls(driver, query):
+def get_business_urls(driver, query, search_url=None):
     print(f"🔎 Searching: {query}")
-    driver.get(f"https://www.google.com/maps/search/{query.replace(' ', '+')}")
+    with metrics.stage("search_nav"):
+        driver.get(search_url or f"https://www.google.com/maps/search/{query.replace(' ', '+')}")
     
     # 1. Wait for the Feed (Sidebar) to load
     try:
         wait = WebDriverWait(driver, 10)
         # Check for the sidebar feed element
-        feed = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
+        with metrics.stage("feed_wait"):
+            feed = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
     except:
         print("   ❌ No results found or layout changed.")
         return []
 
     # 2. Scroll Loop to load all results
     print("   ⬇️ Scrolling to load all results...")
-    last_height = driver.execute_script("return arguments[0].scrollHeight", feed)
-    
-    while True:
-        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed)
-        time.sleep(2) # Give G-Maps time to load the new batch (Critical)
-        
-        new_height = driver.execute_script("return arguments[0].scrollHeight", feed)
-        
-        # If we encounter the "You've reached the end of the list" element, break
-        if "You've reached the end of the list" in driver.page_source:
-            break
-            
-        if new_height == last_height:
-            # Try one more nudge just in case
-            time.sleep(1)
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed)
-            if driver.execute_script("return arguments[0].scrollHeight", feed) == last_height:
-                break
-        
-        last_height = new_height
+    # Each step returns as soon as G-Maps appends the next batch
+    scroll = scroll_feed(driver, feed)
+    print(f"   ⏱️ Scrolled {scroll['steps']} steps in {scroll['seconds']:.1f}s")
 
     # 3. Harvest Links
     # The 'hfpxzc' class is the transparent link overlay covering the business card
-    links = driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc")
-    urls = [link.get_attribute("href") for link in links]
+    with metrics.stage("link_harvest"):
+        links = driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc")
+        urls = [link.get_attribute("href") for link in links]
     
     print(f"   ✅ Found {len(urls)} businesses.")
     return list(set(urls)) # Remove duplicates
 
-def process_urls(driver, urls, query):
+def get_tiled_urls(driver, keyword_query, city):
+    """
+    Tiled search: covers the city with viewport tiles (split where Maps caps
+    the results) and returns (cards or None, unique urls) across all tiles.
+    """
+    cards = []
+
+    def search_tile(url):
+        urls = get_business_urls(driver, f"{keyword_query} ({city} tile)", search_url=url)
+        if CARD_MODE:
+            cards.extend(harvest_cards(driver))
+        return urls
+
+    urls, plan = tiled_search(search_tile, keyword_query, city)
+    if plan:
+        print(f"   {plan.summary()}")
+    if not CARD_MODE:
+        return None, urls
+    unique = set(urls)
+    return [card for card in cards if card["url"] in unique], urls
+
+def get_business_places_cdp(driver, query, base_url=MAPS_BASE_URL):
+    """Same job as get_business_urls, but returns full place records read off the network."""
+    print(f"🔎 Searching (network capture): {query}")
+    places = capture_search(driver, query, base_url=base_url)
+    if not places:
+        print("   ❌ No results found or layout changed.")
+    else:
+        print(f"   ✅ Captured {len(places)} businesses from result batches.")
+    return places
+
+def place_row(place, query):
+    """One Excel row from a card or place record, whichever engine produced it."""
+    return {
+        "Business Name": place["name"],
+        "Phone": place["phone"] or "Not Found",
+        "City": query.split()[-1], # Rough guess of city from query
+        "Category": place.get("category"),
+        "Address": place.get("address"),
+        "Website": place.get("website"),
+        "URL": place["url"],
+        "Search Query": query
+    }
+
+def process_cards(cards, query):
+    """Card mode: returns rows for cards that already show a phone, plus the URLs still to visit."""
+    complete, to_visit = partition_cards(cards, clean_phone)
+    data = [place_row(card, query) for card in complete]
+    print(f"   📇 {len(complete)} leads straight from cards, {len(to_visit)} place pages to open.")
+    return data, to_visit
+
+def process_urls(driver, urls, query, cache=None):
     data = []
     
-    for i, url in enumerate(urls):
-        try:
-            driver.get(url)
-            
-            # Wait for the H1 (Business Name) to confirm page load
-            WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
-            
-            name = extract_name(driver)
-            phone = extract_phone(driver)
-            
-            # Filter logic: Only keep if it matches requirements
-            if BUSINESS_NAME.lower() in name.lower() or True: # 'True' keeps everything, adjust if needed
-                print(f"   [{i+1}/{len(urls)}] {name} -> {phone}")
-                data.append({
-                    "Business Name": name,
-                    "Phone": phone,
-                    "City": query.split()[-1], # Rough guess of city from query
-                    "URL": url,
-                    "Search Query": query
-                })
-        except Exception as e:
-            print(f"   ⚠️ Error scraping {url}: {e}")
+    # Cached places come back first; the rest load side by side in DETAIL_TABS
+    # tabs and each is read as soon as it is ready
+    places = extract_in_tabs(driver, urls, n_tabs=DETAIL_TABS, lean=LEAN_MODE, cache=cache, city=query.split()[-1])
+    for i, (url, place) in enumerate(places):
+        if place is None:
+            print(f"   ⚠️ Error scraping {url}: page did not load")
             continue
+        
+        # Embedded place data first, rendered DOM only if that fails
+        name = place["name"]
+        phone = place["phone"] or "Not Found"
+        
+        # Filter logic: Only keep if it matches requirements
+        if BUSINESS_NAME.lower() in name.lower() or True: # 'True' keeps everything, adjust if needed
+            print(f"   [{i+1}/{len(urls)}] {name} -> {phone}")
+            data.append(place_row(place, query))
             
     return data
 
-def save_to_excel(new_data):
+def save_batch(sink, new_data):
     if not new_data:
         return
     
-    df_new = pd.DataFrame(new_data)
-    
-    if os.path.exists(OUTPUT_FILE):
-        df_existing = pd.read_excel(OUTPUT_FILE)
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        # Drop duplicates based on URL to avoid re-saving the same business
-        df_combined.drop_duplicates(subset=['URL'], keep='last', inplace=True)
-    else:
-        df_combined = df_new
-        
-    df_combined.to_excel(OUTPUT_FILE, index=False)
-    print(f"💾 Saved {len(new_data)} new rows to {OUTPUT_FILE}")
+    # Rows for places already in the sink replace them (same place URL)
+    new, replaced, ms = sink.write(new_data)
+    metrics.add("save", ms / 1000)
+    print(f"💾 Saved {new} new rows ({replaced} updated) in {ms:.1f} ms")
+
+def export_excel(sink):
+    rows = sink.materialize(OUTPUT_FILE)
+    print(f"📤 Wrote {rows} rows to {OUTPUT_FILE}")
+
+def report_metrics():
+    # Per-stage timers of this run, printed and kept as a JSON file
+    snapshot = metrics.snapshot()
+    print(stage_summary(snapshot))
+    print(f"📈 Metrics written to {write_run(snapshot, 'fi')}")
 
 # ================= MAIN =================
+def main_playwright(queries, sink, cache=None):
+    """The whole run on the async Playwright engine: every query shares one browser."""
+    seen = RunSeen()
+    results, seconds = run_queries(
+        queries, clean_phone, concurrency=PLAYWRIGHT_PAGES, lean=LEAN_MODE, card_mode=CARD_MODE,
+        seen=seen, cache=cache
+    )
+    total = 0
+    for query in queries:
+        print(f"🔎 {query}: {len(results[query])} businesses")
+        save_batch(sink, [place_row(place, query) for place in results[query]])
+        total += len(results[query])
+    print(f"🎭 Playwright: {total} places in {seconds:.0f}s ({total / max(seconds, 1) * 60:.1f} places/min)")
+    print(seen.summary())
+
 def main():
-    driver = setup_driver()
+    # Blank/repeated keywords and repeated cities never become searches
+    queries = plan_queries(BUSINESS_NAME, KEYWORDS, CITIES)
+    metrics.reset()
+    cache = PlaceCache(ttl_days=CACHE_TTL_DAYS, force_refresh=FORCE_REFRESH)
+    # Rows from earlier runs in OUTPUT_FILE carry over into a new sink
+    sink = ResultSink(SINK_FILE, seed_excel=OUTPUT_FILE)
+    
+    if BROWSER_ENGINE == "playwright":
+        try:
+            main_playwright([query for query, _, _ in queries], sink, cache)
+        finally:
+            export_excel(sink)
+            print(sink.summary())
+            sink.close()
+            print(extraction_summary())
+            print(cache.summary())
+            cache.close()
+            report_metrics()
+            print("🏁 Scraping Complete.")
+        return
+
+    # One browser for the whole run; each query leases it instead of relaunching
+    pool = DriverPool(lambda: setup_driver(lean=LEAN_MODE), max_size=1)
+    # Places already handled by an earlier query of this run
+    seen = RunSeen()
     
     try:
-        all_data = []
-        
-        for city in CITIES:
-            for keyword in KEYWORDS:
-                query = f"{BUSINESS_NAME} {keyword} {city}"
-                
+        for query, city, keyword in queries:
+            with pool.lease() as driver:
                 # Step 1: Get all Links for this query
-                urls = get_business_urls(driver, query)
+                cards = None
+                if SEARCH_ENGINE == "cdp":
+                    cards = get_business_places_cdp(driver, query)
+                    urls = [card["url"] for card in cards]
+                elif TILED_SEARCH:
+                    cards, urls = get_tiled_urls(driver, f"{BUSINESS_NAME} {keyword}", city)
+                else:
+                    urls = get_business_urls(driver, query)
                 
+                # Step 2: Drop places an earlier query already produced, before any page load
+                urls = seen.claim(urls)
                 if not urls:
                     continue
                 
-                # Step 2: Visit each link and extract data
-                batch_data = process_urls(driver, urls, query)
+                # Step 3: Take what the feed cards (or captured records) already show
+                if cards is None and CARD_MODE:
+                    cards = harvest_cards(driver)
+                batch_data = []
+                if cards is not None:
+                    fresh = set(urls)
+                    cards = [card for card in cards if card["url"] in fresh]
+                    batch_data, urls = process_cards(cards, query)
                 
-                # Step 3: Save progressively (so you don't lose data if it crashes)
-                save_to_excel(batch_data)
+                # Step 4: Visit the remaining links and extract data
+                batch_data += process_urls(driver, urls, query, cache)
+            
+            # Step 5: Save progressively (so you don't lose data if it crashes)
+            save_batch(sink, batch_data)
                 
     finally:
-        driver.quit()
+        export_excel(sink)
+        print(sink.summary())
+        sink.close()
+        print(startup_summary())
+        print(extraction_summary())
+        print(lean_report(LEAN_MODE, page_stats))
+        print(seen.summary())
+        print(cache.summary())
+        cache.close()
+        print(pool.summary())
+        pool.close()
+        report_metrics()
         print("🏁 Scraping Complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+# =====================================================
+# GAZETTEER – ONE CITY LIST FOR EVERY APP
+# =====================================================
+# gazetteer.json is the only place cities live. It is parsed once per
+# process (Streamlit reruns re-execute the app script, not this module) and
+# indexed by state and by name. The app pickers and the all-India list are
+# derived from it, so the same city is never searched twice in one run.
+import functools
+import json
+import os
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.json")
+
+ALL_INDIA = "India"
+ALL_STATES = "India (States)"
+
+
+@functools.lru_cache(maxsize=None)
+def _index():
+    with open(GAZETTEER_FILE, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    by_state = {}
+    by_name = {}  # search name -> [city, ...] (e.g. Udaipur is in Rajasthan and Tripura)
+    aliases = {}
+    for state, rows in raw["states"].items():
+        by_state[state] = []
+        for row in rows:
+            name, lat, lng, population = row[:4]
+            city = {"name": name, "state": state, "lat": lat, "lng": lng, "population": population}
+            by_state[state].append(city)
+            by_name.setdefault(name, []).append(city)
+            for alias in (row[4] if len(row) > 4 else []):
+                aliases[alias] = name
+
+    regions = {region: [aliases.get(name, name) for name in names] for region, names in raw["regions"].items()}
+    return by_state, by_name, aliases, regions
+
+
+def canonical(name):
+    """Resolves an alternative spelling ("Ara", "Bellary") to the gazetteer name."""
+    _, _, aliases, _ = _index()
+    return aliases.get(name, name)
+
+
+def city(name, state=None):
+    """City record (name, state, lat, lng, population) or None; `state` picks between namesakes."""
+    _, by_name, _, _ = _index()
+    matches = by_name.get(canonical(name), [])
+    for match in matches:
+        if state is None or match["state"] == state:
+            return match
+    return None
+
+
+def states():
+    by_state, _, _, _ = _index()
+    return list(by_state)
+
+
+def cities(state):
+    """City names of a state or region (e.g. "Delhi NCR"), in gazetteer order."""
+    by_state, _, _, regions = _index()
+    if state in regions:
+        return list(regions[state])
+    return [c["name"] for c in by_state.get(state, [])]
+
+
+@functools.lru_cache(maxsize=None)
+def all_india_cities():
+    """Every distinct search name once, largest cities first (localities without a population last)."""
+    _, by_name, _, _ = _index()
+    largest = {name: max(c["population"] or 0 for c in matches) for name, matches in by_name.items()}
+    return sorted(largest, key=lambda name: -largest[name])
+
+
+@functools.lru_cache(maxsize=None)
+def city_options():
+    """
+    Picker contents shared by the Streamlit apps: {label: [city, ...]} with the
+    all-India list, every state as one query each, then states and regions
+    alphabetically. Cached, so reruns do not rebuild it.
+    """
+    _, _, _, regions = _index()
+    options = {ALL_INDIA: all_india_cities(), ALL_STATES: states()}
+    for label in sorted(states() + list(regions)):
+        options[label] = cities(label)
+    return options
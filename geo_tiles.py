@@ -0,0 +1,158 @@
+# =====================================================
+# GEOGRAPHIC TILE PLANNER
+# =====================================================
+# One /maps/search/<query> stops at roughly 120 results, however large the
+# city. The planner covers a city's bounding box with viewport tiles and
+# searches each one anchored at its centre (/maps/search/<q>/@lat,lng,zoom),
+# so Maps ranks results inside that viewport. A tile whose search comes back
+# (nearly) full probably hit the cap and is split into four; quieter tiles
+# are left alone. Places found by several tiles are kept once.
+import math
+import threading
+
+from cdp_capture import MAPS_BASE_URL
+from gazetteer import city
+from place_ids import canonical_place_id
+
+RESULT_CAP = 120        # Maps never lists more than this per search
+SATURATION = 100        # a tile returning this many results probably hit the cap
+MIN_TILE_KM = 1.0       # never split below this width
+MAX_DEPTH = 3           # splits per starting tile (4**3 = 64 leaves at most)
+VIEWPORT_PX = 1000      # approximate width of the results map
+KM_PER_DEG_LAT = 111.32
+
+
+def city_radius_km(population):
+    """Rough urban half-width: ~3 km for a small town, ~21 km for Mumbai."""
+    return max(3.0, min(25.0, 0.006 * math.sqrt(population or 0)))
+
+
+def city_bounds(name, state=None):
+    """(south, west, north, east) around a gazetteer city, or None if unknown."""
+    record = city(name, state)
+    if record is None:
+        return None
+    half = city_radius_km(record["population"])
+    dlat = half / KM_PER_DEG_LAT
+    dlng = half / (KM_PER_DEG_LAT * math.cos(math.radians(record["lat"])))
+    return (record["lat"] - dlat, record["lng"] - dlng, record["lat"] + dlat, record["lng"] + dlng)
+
+
+# ================= TILE GEOMETRY =================
+def tile_center(bounds):
+    south, west, north, east = bounds
+    return (south + north) / 2, (west + east) / 2
+
+
+def tile_width_km(bounds):
+    south, west, north, east = bounds
+    lat, _ = tile_center(bounds)
+    return (east - west) * KM_PER_DEG_LAT * math.cos(math.radians(lat))
+
+
+def tile_zoom(bounds):
+    """Web-Mercator zoom at which the tile roughly fills the map viewport."""
+    lat, _ = tile_center(bounds)
+    meters_per_px = tile_width_km(bounds) * 1000 / VIEWPORT_PX
+    zoom = math.log2(156543.03 * math.cos(math.radians(lat)) / meters_per_px)
+    return max(10, min(18, round(zoom, 1)))
+
+
+def split_tile(bounds, rows=2, cols=2):
+    south, west, north, east = bounds
+    dlat = (north - south) / rows
+    dlng = (east - west) / cols
+    return [
+        (south + r * dlat, west + c * dlng, south + (r + 1) * dlat, west + (c + 1) * dlng)
+        for r in range(rows) for c in range(cols)
+    ]
+
+
+def search_url(query, bounds, base_url=MAPS_BASE_URL):
+    lat, lng = tile_center(bounds)
+    return f"{base_url}/maps/search/{query.replace(' ', '+')}/@{lat:.5f},{lng:.5f},{tile_zoom(bounds)}z"
+
+
+# ================= PLAN =================
+class TilePlan:
+    """
+    Work list of tiles for one query in one city. Thread-safe, so parallel
+    workers (effi.py) can share a plan:
+
+        plan = TilePlan(bounds)
+        while (tile := plan.next_tile()):
+            urls = search(tile["url"])
+            new_urls = plan.record(tile, urls)   # may queue 4 child tiles
+    """
+
+    def __init__(self, bounds, query="", base_url=MAPS_BASE_URL, grid=2):
+        self.query = query
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self._pending = [self._tile(b, 0) for b in split_tile(bounds, grid, grid)]
+        self._seen = set()
+        self.stats = {"tiles": 0, "split": 0, "results": 0, "unique": 0}
+
+    def _tile(self, bounds, depth):
+        return {"bounds": bounds, "depth": depth, "url": search_url(self.query, bounds, self.base_url)}
+
+    def next_tile(self):
+        with self._lock:
+            return self._pending.pop(0) if self._pending else None
+
+    def claim(self, urls):
+        """Keeps only URLs no earlier tile produced."""
+        fresh = []
+        with self._lock:
+            for url in urls:
+                key = canonical_place_id(url)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    fresh.append(url)
+            self.stats["unique"] += len(fresh)
+        return fresh
+
+    def record(self, tile, urls):
+        """
+        Books one tile's results and returns the URLs new to this plan. A tile
+        that looks capped has its four quadrants queued for next_tile().
+        """
+        with self._lock:
+            self.stats["tiles"] += 1
+            self.stats["results"] += len(urls)
+            if (
+                len(urls) >= SATURATION
+                and tile["depth"] < MAX_DEPTH
+                and tile_width_km(tile["bounds"]) / 2 >= MIN_TILE_KM
+            ):
+                self._pending.extend(self._tile(b, tile["depth"] + 1) for b in split_tile(tile["bounds"]))
+                self.stats["split"] += 1
+        return self.claim(urls)
+
+    def summary(self):
+        s = self.stats
+        duplicates = s["results"] - s["unique"]
+        return (
+            f"🗺️ Tiles: {s['tiles']} searched, {s['split']} split, "
+            f"{s['unique']} unique places ({duplicates} cross-tile duplicates)"
+        )
+
+
+def tiled_search(search, query, city_name, state=None, base_url=MAPS_BASE_URL):
+    """
+    Runs `search(url) -> [place urls]` over every tile of the city and returns
+    (unique urls, plan). Falls back to a single plain search when the city is
+    not in the gazetteer.
+    """
+    bounds = city_bounds(city_name, state)
+    if bounds is None:
+        plain_query = f"{query} {city_name}".replace(" ", "+")
+        return search(f"{base_url}/maps/search/{plain_query}"), None
+
+    plan = TilePlan(bounds, query, base_url)
+    urls = []
+    tile = plan.next_tile()
+    while tile:
+        urls.extend(plan.record(tile, search(tile["url"])))
+        tile = plan.next_tile()
+    return urls, plan
@@ -0,0 +1,295 @@
+# =====================================================
+# BACKGROUND JOB SERVICE
+# =====================================================
+# Scraping used to run inside the Streamlit script, so any widget click
+# re-ran the script and killed or duplicated the work. The service is a
+# separate process with a job queue; the apps only submit jobs and watch
+# them. Commands (submit / pause / resume / cancel / drain) go down one
+# multiprocessing queue, and status, progress, log lines and per-place
+# results come back up another, where a reader thread folds them into a
+# JobView per job that the script can render on every rerun.
+#
+# A job is a plain function `run(spec, job)` named as "module:function";
+# it calls job.checkpoint() between steps, which is where pause blocks and
+# cancel raises JobCancelled, so the job's finally blocks close its browsers.
+# Log events go to a JSONL file per job from the service process and to a
+# bounded EventLog in the view.
+#
+# The service process is not a daemon, because scheduler jobs start worker
+# processes of their own. close() (registered with atexit) cancels what is
+# still running when the app exits.
+import atexit
+import importlib
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+from event_log import EventLog, JsonlSink, log_path, make_event
+from lead_index import LeadIndex
+
+MAX_JOBS = 1          # jobs running at once; the rest wait in the queue
+LOG_LINES = 500       # per job, kept by the observer
+ACTIVE = ("submitted", "queued", "running", "paused", "cancelling")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# ================= SERVICE PROCESS =================
+class JobControl:
+    """What a running job sees: checkpoints plus the progress channel."""
+
+    def __init__(self, job_id, events):
+        self.job_id = job_id
+        self._events = events
+        self._sink = None  # the job's JSONL log, opened when it starts running
+        self._resume = threading.Event()
+        self._resume.set()
+        self._cancel = threading.Event()
+
+    def emit(self, kind, payload=None):
+        self._events.put((self.job_id, kind, payload))
+
+    def log(self, msg, level="info", **fields):
+        """fields: stage, query, place, duration (see event_log)."""
+        self.add(make_event(msg, level, **fields))
+
+    def add(self, event):
+        """Takes an event built elsewhere (a scheduler worker's make_event)."""
+        if self._sink:
+            self._sink.put(event)
+        self.emit("log", event)
+
+    def progress(self, done, total, label=""):
+        self.emit("progress", (done, total, label))
+
+    def result(self, lead):
+        self.emit("result", lead)
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def checkpoint(self):
+        """Blocks while paused; raises JobCancelled once the job is cancelled."""
+        if not self._resume.is_set():
+            self.emit("status", "paused")
+            while not self._resume.wait(0.2):
+                if self._cancel.is_set():
+                    break
+            if not self._cancel.is_set():
+                self.emit("status", "running")
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+
+def _resolve(target):
+    module, _, name = target.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _run_job(job_id, target, spec, control, events):
+    if control._cancel.is_set():
+        events.put((job_id, "status", "cancelled"))
+        return
+    control._sink = JsonlSink(log_path(job_id))
+    events.put((job_id, "status", "running"))
+    try:
+        _resolve(target)(spec, control)
+        events.put((job_id, "status", "done"))
+    except JobCancelled:
+        events.put((job_id, "status", "cancelled"))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        control._sink.put(make_event(f"❌ {error}", "error"))
+        events.put((job_id, "error", error))
+        events.put((job_id, "status", "failed"))
+
+
+def _serve(commands, events, max_jobs):
+    """Service process main loop: dispatch commands, run jobs on max_jobs runner threads."""
+    pending = queue.Queue()
+    controls = {}
+
+    def runner():
+        for job_id, target, spec in iter(pending.get, None):
+            control = controls[job_id]
+            _run_job(job_id, target, spec, control, events)
+            if control._sink:
+                control._sink.close()
+            del controls[job_id]  # later controls for a finished job are ignored
+
+    runners = [threading.Thread(target=runner, name=f"job-runner-{i}", daemon=True) for i in range(max_jobs)]
+    for thread in runners:
+        thread.start()
+
+    draining = False
+    while not draining or any(thread.is_alive() for thread in runners):
+        try:
+            command, *args = commands.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        if command == "submit":
+            job_id, target, spec = args
+            if draining:
+                events.put((job_id, "error", "Job service is draining; job not started"))
+                events.put((job_id, "status", "failed"))
+                continue
+            controls[job_id] = JobControl(job_id, events)
+            pending.put((job_id, target, spec))
+            events.put((job_id, "status", "queued"))
+        elif command in ("pause", "resume", "cancel") and args[0] in controls:
+            control = controls[args[0]]
+            if command == "pause":
+                control._resume.clear()
+            elif command == "resume":
+                control._resume.set()
+            else:
+                control._cancel.set()
+                control._resume.set()
+                events.put((args[0], "status", "cancelling"))
+        elif command == "drain" and not draining:
+            # queued jobs still run and can still be paused or cancelled;
+            # nothing new is accepted, and the loop ends once the runners finish
+            draining = True
+            for _ in runners:
+                pending.put(None)
+
+    for thread in runners:
+        thread.join()
+    events.put((None, "service", "drained"))
+
+
+# ================= OBSERVER (APP PROCESS) =================
+class JobView:
+    """Everything the service reported about one job, as the app renders it."""
+
+    def __init__(self, job_id, spec, link_field="Link"):
+        self.id = job_id
+        self.spec = spec
+        self.status = "submitted"
+        self.progress = (0, 0, "")
+        self.events = EventLog(LOG_LINES)
+        self.error = None
+        self.metrics = None  # latest run_metrics snapshot from the job
+        self.leads = LeadIndex(link_field=link_field)
+        self.submitted_at = time.time()
+        self.lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE
+
+    def rows(self):
+        with self.lock:
+            return list(self.leads.rows)
+
+    def apply(self, kind, payload):
+        with self.lock:
+            if kind == "status":
+                self.status = payload
+            elif kind == "progress":
+                self.progress = payload
+            elif kind == "log":
+                self.events.add(payload)
+            elif kind == "result":
+                self.leads.add(payload)
+            elif kind == "metrics":
+                self.metrics = payload
+            elif kind == "error":
+                self.error = payload
+                self.events.log(f"❌ {payload}", level="error")
+
+
+class JobService:
+    """
+    service = JobService()                      # one per app server (st.cache_resource)
+    job_id = service.submit("scrape_job:run", spec)
+    view = service.jobs[job_id]                 # status, progress, events, leads
+    service.pause(job_id) / resume / cancel / drain()
+    """
+
+    def __init__(self, max_jobs=MAX_JOBS):
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.draining = False
+        self._ids = itertools.count(1)
+        self._ctx = mp.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._process = None
+        self._start()
+        threading.Thread(target=self._read_events, name="job-events", daemon=True).start()
+        atexit.register(self.close)
+
+    def _start(self):
+        self._commands = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_serve, args=(self._commands, self._events, self.max_jobs), name="job-service"
+        )
+        self._process.start()
+        self.draining = False
+
+    def _read_events(self):
+        while True:
+            job_id, kind, payload = self._events.get()
+            if kind == "service":
+                self._process.join()  # drained: the next submit starts a fresh process
+                self.draining = False
+                continue
+            view = self.jobs.get(job_id)
+            if view is not None:
+                view.apply(kind, payload)
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    # ================= CONTROLS =================
+    def submit(self, target, spec, link_field="Link"):
+        if self.draining:
+            raise RuntimeError("Job service is draining; no new jobs until it has finished")
+        if not self.alive:
+            self._start()  # after a drain, or if the service process died
+        job_id = f"job-{next(self._ids)}"
+        self.jobs[job_id] = JobView(job_id, spec, link_field)
+        self._commands.put(("submit", job_id, target, spec))
+        return job_id
+
+    def pause(self, job_id):
+        self._commands.put(("pause", job_id))
+
+    def resume(self, job_id):
+        self._commands.put(("resume", job_id))
+
+    def cancel(self, job_id):
+        self._commands.put(("cancel", job_id))
+
+    def drain(self):
+        """Runs what is queued, accepts nothing new, then lets the service process exit."""
+        self.draining = True
+        self._commands.put(("drain",))
+
+    def close(self, timeout=30):
+        """Cancels every job and waits for the service process to exit (terminates it after `timeout`)."""
+        if not self.alive:
+            return
+        for view in self.jobs.values():
+            if view.active:
+                self.cancel(view.id)
+        self.drain()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def active_jobs(self):
+        active = [view for view in self.jobs.values() if view.active]
+        if active and not self.alive:
+            # the service process died under its jobs
+            for view in active:
+                view.apply("error", "Job service stopped")
+                view.apply("status", "failed")
+            return []
+        return active
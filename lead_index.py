@@ -0,0 +1,96 @@
+# =====================================================
+# LEAD DEDUP INDEX
+# =====================================================
+# The apps used to find duplicates by scanning every saved lead (or
+# rebuilding a set / DataFrame of them) for each new one. The index keeps
+# the leads in order plus two dicts pointing into them: normalized phone and
+# canonical place id, so a lookup is O(1) however long the run. A lead that
+# matches on either key is merged into the existing row: blank fields get
+# filled and the keywords/cities it was found under are added, instead of
+# the second sighting being thrown away.
+import re
+
+from place_ids import canonical_place_id
+
+EMPTY = (None, "", "Not Found")
+
+
+def phone_key(phone):
+    """Digits of a phone without +91 / trunk 0, so +91 98290 12345 == 098290-12345."""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", str(phone))
+    if digits.startswith("91") and len(digits) > 10:
+        digits = digits[2:]
+    return digits.lstrip("0") or None
+
+
+def clean_phone(text):
+    """The number to store for a lead: digits without +91, or None when shorter than 10 digits."""
+    if not text: return None
+    digits = re.sub(r"\D", "", text)
+    if digits.startswith("91") and len(digits) > 10:
+        digits = digits[2:]
+    if len(digits) < 10: return None
+    return digits
+
+
+class LeadIndex:
+    """
+    leads = LeadIndex(link_field="Link")
+    lead, is_new = leads.add({"Company": ..., "Phone": ..., "Link": ...})
+    pd.DataFrame(leads.rows)
+    """
+
+    def __init__(self, phone_field="Phone", link_field="Link", merge_fields=("City", "Keyword")):
+        self.phone_field = phone_field
+        self.link_field = link_field
+        self.merge_fields = merge_fields
+        self.rows = []
+        self._by_phone = {}
+        self._by_place = {}
+        self.merged = 0
+
+    def _keys(self, lead):
+        return phone_key(lead.get(self.phone_field)), canonical_place_id(lead.get(self.link_field))
+
+    def _locate(self, phone, place):
+        index = self._by_phone.get(phone) if phone else None
+        if index is None and place:
+            index = self._by_place.get(place)
+        return index
+
+    def add(self, lead):
+        """Stores a new lead or merges it into the row it duplicates; returns (row, is_new)."""
+        phone, place = self._keys(lead)
+        index = self._locate(phone, place)
+        is_new = index is None
+        if is_new:
+            index = len(self.rows)
+            self.rows.append(dict(lead))
+        else:
+            self._merge(self.rows[index], lead)
+            self.merged += 1
+
+        # a re-sighting may bring the second key (e.g. same phone, other listing)
+        if phone:
+            self._by_phone.setdefault(phone, index)
+        if place:
+            self._by_place.setdefault(place, index)
+        return self.rows[index], is_new
+
+    def _merge(self, row, lead):
+        for field, value in lead.items():
+            if value in EMPTY:
+                continue
+            current = row.get(field)
+            if current in EMPTY:
+                row[field] = value
+            elif field in self.merge_fields and str(value) not in str(current).split(", "):
+                row[field] = f"{current}, {value}"
+
+    def __len__(self):
+        return len(self.rows)
+
+    def summary(self):
+        return f"👥 Leads: {len(self.rows)} unique, {self.merged} duplicate sightings merged"
@@ -0,0 +1,95 @@
+# =====================================================
+# LEAN BROWSER PROFILE – BLOCK WHAT WE NEVER READ
+# =====================================================
+# Place pages pull map tiles, photos, fonts and imagery although we only
+# read text from the side panel. Lean mode turns images off in the profile
+# and blocks the rest by URL pattern through the DevTools Protocol.
+# Per-page load time and transfer size come for free from the place
+# extraction script. At the end of a run they are compared with the last
+# full (non-lean) run to report what was saved.
+import json
+import os
+
+from driver_bootstrap import BOOTSTRAP_DIR
+
+HISTORY_FILE = os.path.join(BOOTSTRAP_DIR, "page_load_history.json")
+
+# Network.setBlockedURLs patterns (wildcards only). Resource-type blocking
+# needs request interception, which Selenium cannot service synchronously,
+# so images are disabled by content setting and everything else by URL.
+BLOCKED_URL_PATTERNS = [
+    # map tiles (vector + satellite) and Street View
+    "*/maps/vt*", "*/maps/vt/*", "*/kh/v=*", "*streetviewpixels*", "*/cbk?*",
+    # photos and imagery
+    "*googleusercontent.com/*", "*/maps/preview/photo*", "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp",
+    # fonts
+    "*fonts.gstatic.com/*", "*.woff", "*.woff2", "*.ttf",
+    # media
+    "*.mp4", "*.webm", "*.m3u8",
+]
+
+
+def apply_lean_options(options):
+    """Profile-level part of lean mode; call before launching the browser."""
+    prefs = dict(options.experimental_options.get("prefs", {}))
+    prefs.update({
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    options.add_experimental_option("prefs", prefs)
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--autoplay-policy=user-gesture-required")
+    return options
+
+
+def enable_lean_blocking(driver):
+    """URL blocking is per tab: call on every new browser and every new tab."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+# ================= SAVINGS REPORT =================
+def _load_history():
+    try:
+        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_history(history):
+    os.makedirs(BOOTSTRAP_DIR, exist_ok=True)
+    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+
+
+def lean_report(lean, page_stats):
+    """
+    page_stats: {"pages", "load_ms", "bytes"} totals for this run
+    (place_extract.page_stats). Stores this run's per-page averages and,
+    for a lean run, reports the savings against the last full run.
+    """
+    pages = page_stats["pages"]
+    if not pages:
+        return "🪶 Page loads: no place pages measured"
+
+    avg_ms = page_stats["load_ms"] / pages
+    avg_kb = page_stats["bytes"] / pages / 1024
+    mode = "lean" if lean else "full"
+
+    history = _load_history()
+    history[mode] = {"avg_load_ms": avg_ms, "avg_kb": avg_kb, "pages": pages}
+    _save_history(history)
+
+    line = f"🪶 Page loads ({mode}): {avg_kb:.0f} KB, {avg_ms / 1000:.2f}s per page over {pages} pages"
+    baseline = history.get("full")
+    if lean and baseline:
+        saved_kb = baseline["avg_kb"] - avg_kb
+        saved_ms = baseline["avg_load_ms"] - avg_ms
+        line += (
+            f" | saved {saved_kb:.0f} KB and {saved_ms / 1000:.2f}s per page, "
+            f"~{saved_kb * pages / 1024:.1f} MB and {saved_ms * pages / 60000:.1f} min this run"
+        )
+    elif lean:
+        line += " | run once without lean mode to get a baseline"
+    return line
@@ -0,0 +1,74 @@
+# =====================================================
+# THROTTLED LIVE RESULTS TABLE (STREAMLIT)
+# =====================================================
+# Re-sending the whole results DataFrame after every lead makes the UI the
+# slowest part of a long run. LiveTable coalesces updates (at most one per
+# MIN_INTERVAL seconds unless MIN_ROWS new rows are waiting), appends only
+# the new rows to the rendered table (add_rows), and shows a capped window
+# of the latest rows: once WINDOW rows are on screen the table is redrawn
+# from the newest WINDOW/2, so an update costs the same at row 100 and at
+# row 100,000. Streamlit releases without add_rows get the same throttled,
+# windowed redraw of the newest WINDOW rows instead. The total metric always
+# counts every row.
+import time
+
+import pandas as pd
+
+WINDOW = 200          # rows kept on screen
+MIN_INTERVAL = 1.0    # seconds between redraws
+MIN_ROWS = 25         # ... unless this many new rows are waiting
+
+
+class LiveTable:
+    """
+    table = LiveTable(results_placeholder, leads.rows, metric_placeholder)
+    table.notify()   # after rows were added; redraws only when the budget allows
+    table.flush()    # end of run: draw whatever is pending
+    """
+
+    def __init__(self, placeholder, rows, metric=None, label="Leads Collected",
+                 window=WINDOW, min_interval=MIN_INTERVAL, min_rows=MIN_ROWS, **dataframe_kwargs):
+        self.placeholder = placeholder
+        self.rows = rows
+        self.metric = metric
+        self.label = label
+        self.window = window
+        self.min_interval = min_interval
+        self.min_rows = min_rows
+        self.dataframe_kwargs = dataframe_kwargs
+        self._element = None
+        self._shown = 0       # rows currently in the rendered table
+        self._rendered = 0    # len(rows) at the last update
+        self._last = 0.0
+        self.redraws = 0
+
+    def notify(self, force=False):
+        pending = len(self.rows) - self._rendered
+        if pending <= 0 and not force:
+            return
+        if not force and pending < self.min_rows and time.monotonic() - self._last < self.min_interval:
+            return
+        self._update()
+
+    def flush(self):
+        self.notify(force=True)
+
+    def _update(self):
+        total = len(self.rows)
+        new_rows = self.rows[self._rendered:total]
+        appendable = self._element is None or hasattr(type(self._element), "add_rows")
+        if self._element is not None and appendable and new_rows and self._shown + len(new_rows) <= self.window:
+            # only the new rows travel to the browser
+            self._element.add_rows(pd.DataFrame(new_rows))
+            self._shown += len(new_rows)
+        elif total:
+            # redraw from the tail, leaving headroom for the next appends
+            keep = self.window // 2 if appendable else self.window
+            tail = self.rows[-keep:] if total > self.window else self.rows[:total]
+            self._element = self.placeholder.dataframe(pd.DataFrame(tail), **self.dataframe_kwargs)
+            self._shown = len(tail)
+            self.redraws += 1
+        if self.metric is not None:
+            self.metric.metric(self.label, total, help=f"Table shows the latest {self._shown}")
+        self._rendered = total
+        self._last = time.monotonic()
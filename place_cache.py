@@ -0,0 +1,172 @@
+# =====================================================
+# PERSISTENT PLACE CACHE (SQLITE)
+# =====================================================
+# A place scraped last week is very likely unchanged, so extraction loops
+# ask this cache before opening a place page. Entries are keyed by the
+# canonical place id from the link (place_ids), expire after a TTL and are
+# evicted least-recently-used once the table outgrows MAX_ENTRIES. A place
+# read without a phone (often a page that had not finished rendering) is kept
+# for PARTIAL_TTL_HOURS only, so the next day's run tries it again.
+# "Force refresh" skips lookups but still writes fresh results back.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from driver_bootstrap import BOOTSTRAP_DIR
+from place_ids import canonical_place_id
+
+CACHE_DB = os.path.join(BOOTSTRAP_DIR, "place_cache.sqlite")
+DEFAULT_TTL_DAYS = 30
+PARTIAL_TTL_HOURS = 24
+MAX_ENTRIES = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    place_id    TEXT PRIMARY KEY,
+    name        TEXT,
+    phone       TEXT,
+    city        TEXT,
+    url         TEXT,
+    fetched_at  REAL NOT NULL,
+    last_used   REAL NOT NULL,
+    source_hash TEXT,
+    record      TEXT NOT NULL,
+    expires_at  REAL
+);
+CREATE INDEX IF NOT EXISTS places_last_used ON places (last_used);
+"""
+
+
+def source_hash(place):
+    """Fingerprint of the extracted fields, to tell a re-fetch that changed from one that did not."""
+    fields = {k: place.get(k) for k in ("name", "phone", "address", "website", "category", "lat", "lng")}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PlaceCache:
+    """
+    Shared by worker threads (one connection, one lock). Usage:
+
+        cache = PlaceCache(ttl_days=30, force_refresh=False)
+        place = cache.get(url)          # None on miss / expired / force refresh
+        ...
+        cache.put(url, place, city)
+    """
+
+    def __init__(self, path=CACHE_DB, ttl_days=DEFAULT_TTL_DAYS, max_entries=MAX_ENTRIES, force_refresh=False):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.force_refresh = force_refresh
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "partial": 0, "changed": 0, "evicted": 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+        self.evict()
+
+    def _migrate(self):
+        """Caches written before expires_at existed: give their phoneless places the short TTL too."""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(places)")}
+        if "expires_at" not in columns:
+            self._db.execute("ALTER TABLE places ADD COLUMN expires_at REAL")
+            self._db.execute(
+                "UPDATE places SET expires_at = fetched_at + ? WHERE phone IS NULL OR phone = ''",
+                (PARTIAL_TTL_HOURS * 3600,),
+            )
+            self._db.commit()
+
+    def get(self, url):
+        if self.force_refresh:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        place_id = canonical_place_id(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT record FROM places WHERE place_id = ? AND fetched_at >= ?"
+                " AND (expires_at IS NULL OR expires_at >= ?)",
+                (place_id, now - self.ttl, now),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE places SET last_used = ? WHERE place_id = ?", (now, place_id))
+            self._db.commit()
+            self.stats["hits"] += 1
+        return dict(json.loads(row[0]), url=url, source="cache")
+
+    def put(self, url, place, city=None):
+        place_id = canonical_place_id(url)
+        digest = source_hash(place)
+        record = {k: v for k, v in place.items() if k != "source"}
+        now = time.time()
+        expires_at = None if place.get("phone") else now + PARTIAL_TTL_HOURS * 3600
+        with self._lock:
+            previous = self._db.execute("SELECT source_hash FROM places WHERE place_id = ?", (place_id,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (place_id, place.get("name"), place.get("phone"), city, url, now, now, digest, json.dumps(record),
+                 expires_at),
+            )
+            self._db.commit()
+            self.stats["stored"] += 1
+            if expires_at is not None:
+                self.stats["partial"] += 1
+            if previous and previous[0] != digest:
+                self.stats["changed"] += 1
+
+    def split(self, urls):
+        """(cached places, urls still to fetch) in one pass over a harvested link list."""
+        cached, to_fetch = [], []
+        for url in urls:
+            place = self.get(url)
+            if place is None:
+                to_fetch.append(url)
+            else:
+                cached.append(place)
+        return cached, to_fetch
+
+    def evict(self):
+        """Drops expired entries, then the least recently used beyond max_entries."""
+        with self._lock:
+            now = time.time()
+            cursor = self._db.execute(
+                "DELETE FROM places WHERE fetched_at < ? OR expires_at < ?", (now - self.ttl, now)
+            )
+            evicted = cursor.rowcount
+            (count,) = self._db.execute("SELECT COUNT(*) FROM places").fetchone()
+            if count > self.max_entries:
+                cursor = self._db.execute(
+                    "DELETE FROM places WHERE place_id IN "
+                    "(SELECT place_id FROM places ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                evicted += cursor.rowcount
+            self._db.commit()
+            self.stats["evicted"] += evicted
+
+    def summary(self):
+        s = self.stats
+        lookups = s["hits"] + s["misses"]
+        rate = s["hits"] / lookups * 100 if lookups else 0.0
+        line = (
+            f"🗃️ Place cache: {s['hits']} hits, {s['misses']} misses ({rate:.0f}% hit rate), "
+            f"{s['stored']} stored ({s['partial']} without phone, kept {PARTIAL_TTL_HOURS}h), "
+            f"{s['changed']} changed since last fetch, {s['evicted']} evicted"
+        )
+        if self.force_refresh:
+            line += " | force refresh"
+        return line
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,318 @@
+# =====================================================
+# PLACE DATA EXTRACTION
+# =====================================================
+# Card mode: once the results feed has been scrolled, most of what we keep
+# (name, often the phone, category, rating) is already rendered in the
+# cards. One script call reads every card, so only cards without a phone
+# still need a full place-page navigation.
+#
+# Place pages: one injected script gathers everything in a single round
+# trip - the embedded place record from window.APP_INITIALIZATION_STATE,
+# the rendered h1/phone/address/website as a fallback, what the URL
+# itself encodes, and the page's own load timing. The embedded record wins; the DOM values are only used
+# when it fails to decode. Every record says which path served it.
+import collections
+import json
+import re
+import threading
+import urllib.parse
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from run_metrics import metrics
+
+# Pulls every loaded result card in one pass. Class names are Maps' own;
+# every field falls back to null so a layout change degrades to a detail
+# visit instead of an exception.
+CARDS_JS = """
+const phonePattern = /(?:\\+91[\\s-]?)?\\d[\\d\\s-]{8,}\\d/;
+const text = (root, sel) => {
+    const el = root.querySelector(sel);
+    return el ? el.textContent.trim() : null;
+};
+
+return Array.from(document.querySelectorAll("div[role='feed'] a.hfpxzc")).map(link => {
+    const card = link.closest("div.Nv2PK") || link.parentElement;
+    let phone = text(card, "span.UsdlK");
+    let category = null;
+
+    const lines = card.innerText.split("\\n").map(l => l.trim()).filter(Boolean);
+    for (const line of lines) {
+        if (!phone && phonePattern.test(line)) phone = line.match(phonePattern)[0];
+        // "Tyre shop · Station Rd" - first segment of the first dotted line is the category
+        if (!category && line.includes("·") && !/^\\d/.test(line)) category = line.split("·")[0].trim() || null;
+    }
+
+    return {
+        url: link.href,
+        name: link.getAttribute("aria-label") || text(card, ".qBF1Pd"),
+        phone: phone,
+        category: category,
+        rating: text(card, "span.MW4etd")
+    };
+});
+"""
+
+
+def harvest_cards(driver):
+    """Returns one dict per loaded feed card: url, name, phone (raw), category, rating."""
+    with metrics.stage("link_harvest"):
+        return driver.execute_script(CARDS_JS) or []
+
+
+def partition_cards(cards, clean_phone):
+    """
+    Splits harvested cards into leads that are complete already (phone cleaned
+    in place) and the URLs that still need a place-page visit.
+    """
+    complete = []
+    to_visit = []
+    seen = set()
+    for card in cards:
+        if card["url"] in seen:
+            continue
+        seen.add(card["url"])
+
+        phone = clean_phone(card["phone"])
+        if phone and card["name"]:
+            complete.append(dict(card, phone=phone))
+        else:
+            to_visit.append(card["url"])
+    return complete, to_visit
+
+
+# ================= PLACE PAGE SCRIPT =================
+# APP_INITIALIZATION_STATE[3] holds ")]}'"-prefixed JSON strings; the one
+# whose payload has a record at index 6 is the place. Only that record is
+# sent back, re-serialized, instead of the whole state. Phone candidates are
+# kept short so the payload stays tiny.
+PLACE_JS = """
+const href = location.href;
+const textOf = el => el ? (el.innerText || el.textContent || "").trim() : null;
+
+let embedded = null;
+const state = window.APP_INITIALIZATION_STATE;
+if (state && Array.isArray(state[3])) {
+    for (const part of state[3]) {
+        if (typeof part !== "string" || !part.startsWith(")]}'")) continue;
+        try {
+            const payload = JSON.parse(part.slice(part.indexOf("\\n") + 1));
+            if (Array.isArray(payload) && Array.isArray(payload[6])) {
+                embedded = JSON.stringify(payload[6]);
+                break;
+            }
+        } catch (e) {}
+    }
+}
+
+const phoneCandidates = [];
+document.querySelectorAll("button[aria-label*='Phone'], button[data-item-id*='phone']").forEach(btn => {
+    phoneCandidates.push(btn.getAttribute("aria-label") || textOf(btn));
+});
+document.querySelectorAll("div.Io6YTe, div.fontBodyMedium").forEach(div => {
+    const t = textOf(div);
+    if (t && t.length < 40 && /\\d{3,}/.test(t)) phoneCandidates.push(t);
+});
+
+const address = document.querySelector("button[data-item-id='address']");
+const website = document.querySelector("a[data-item-id='authority']");
+const category = document.querySelector("button[jsaction*='category']");
+const nav = performance.getEntriesByType("navigation")[0];
+const transferred = performance.getEntriesByType("resource")
+    .reduce((sum, entry) => sum + (entry.transferSize || 0), nav ? (nav.transferSize || 0) : 0);
+const nameMatch = href.match(/\\/maps\\/place\\/([^\\/]+)/);
+const coords = href.match(/!3d(-?\\d+\\.\\d+)!4d(-?\\d+\\.\\d+)/) || href.match(/@(-?\\d+\\.\\d+),(-?\\d+\\.\\d+)/);
+
+return {
+    embedded: embedded,
+    hasTitle: !!document.querySelector("h1"),
+    name: textOf(document.querySelector("h1")),
+    phoneCandidates: phoneCandidates,
+    address: address ? address.getAttribute("aria-label") : null,
+    website: website ? website.href : null,
+    category: textOf(category),
+    urlName: nameMatch ? decodeURIComponent(nameMatch[1].replace(/\\+/g, " ")) : null,
+    urlLat: coords ? parseFloat(coords[1]) : null,
+    urlLng: coords ? parseFloat(coords[2]) : null,
+    loadMs: nav ? Math.round((nav.loadEventEnd || performance.now()) - nav.startTime) : null,
+    bytes: transferred
+};
+"""
+
+
+def _dig(data, *path):
+    """Walks nested lists by index, returning None as soon as a step is missing."""
+    for index in path:
+        if not isinstance(data, list) or index >= len(data):
+            return None
+        data = data[index]
+    return data
+
+
+def decode_place_record(record):
+    """
+    Maps a raw Maps place record onto our fields.
+    Returns None when the record does not look like a place (no name).
+    """
+    name = _dig(record, 11)
+    if not isinstance(name, str) or not name:
+        return None
+
+    address = _dig(record, 39)
+    if not address and isinstance(_dig(record, 2), list):
+        address = ", ".join(part for part in record[2] if isinstance(part, str))
+
+    categories = _dig(record, 13)
+    return {
+        "name": name,
+        "phone": _dig(record, 178, 0, 0),
+        "address": address or None,
+        "lat": _dig(record, 9, 2),
+        "lng": _dig(record, 9, 3),
+        "website": _dig(record, 7, 0),
+        "category": categories[0] if isinstance(categories, list) and categories else None,
+        "feature_id": _dig(record, 10),
+    }
+
+
+# ================= DOM FALLBACK =================
+PHONE_TEXT_PATTERN = re.compile(r"^(\+91|0)?[ -]?\d{3,}")
+# Taken from the rendered page when the embedded record has no value for them
+DOM_FILL_FIELDS = ("phone", "address", "website", "category")
+
+
+def pick_phone(candidates):
+    """First candidate that looks like a full phone number (10+ digits)."""
+    for candidate in candidates or []:
+        text = (candidate or "").replace("Phone:", "").strip()
+        if PHONE_TEXT_PATTERN.match(text) and len(re.sub(r"\D", "", text)) >= 10:
+            return text
+    return None
+
+
+def _dom_record(page):
+    address = page["address"]
+    return {
+        "name": page["name"],
+        "phone": pick_phone(page["phoneCandidates"]),
+        "address": address.replace("Address:", "").strip() if address else None,
+        "lat": page["urlLat"],
+        "lng": page["urlLng"],
+        "website": page["website"],
+        "category": page["category"],
+        "feature_id": None,
+    }
+
+
+def extract_name_from_url(url):
+    """Fallback: Extracts business name from Google Maps URL using Regex."""
+    if not url:
+        return "Unknown Business"
+
+    # Regex to find text between /maps/place/ and /data=
+    match = re.search(r"/maps/place/([^/]+)/data=", url)
+    if match:
+        # Replace '+' with space and decode URL percent-encoding (e.g. %20)
+        raw_name = match.group(1).replace("+", " ")
+        return urllib.parse.unquote(raw_name)
+    return "Unknown Business"
+
+
+# ================= ENTRY POINT =================
+_stats_lock = threading.Lock()
+extraction_stats = {"embedded": 0, "dom": 0}
+# Navigation timing + transfer size of every extracted place page (feeds the lean-mode report)
+page_stats = {"pages": 0, "load_ms": 0, "bytes": 0}
+# ... and the latest per-page load times, for percentiles (benchmarks)
+page_times = collections.deque(maxlen=5000)
+
+
+def _decode_embedded(page):
+    if not page["embedded"]:
+        return None
+    try:
+        return decode_place_record(json.loads(page["embedded"]))
+    except ValueError:
+        return None
+
+
+def extract_place(driver, url, wait_seconds=5):
+    """
+    Extracts the currently loaded place page, normally with a single WebDriver
+    command. Only a page with neither embedded data nor an h1 yet costs a
+    wait plus one more script call.
+    The returned dict has name, phone (raw), address, lat, lng, website,
+    category, feature_id, url and source ("embedded" or "dom").
+    """
+    with metrics.stage("extract"):
+        page = driver.execute_script(PLACE_JS)
+        record = _decode_embedded(page)
+
+        if record is None and not page["hasTitle"]:
+            try:
+                WebDriverWait(driver, wait_seconds).until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
+                page = driver.execute_script(PLACE_JS)
+                record = _decode_embedded(page)
+            except TimeoutException:
+                pass
+
+        return place_from_page(page, url, record)
+
+
+def place_from_page(page, url, record=None):
+    """
+    Turns a PLACE_JS result into a place record and counts it in the stats.
+    Shared with the Playwright engine, which runs the same script.
+    """
+    if record is None:
+        record = _decode_embedded(page)
+
+    source = "embedded"
+    if record is None:
+        record = _dom_record(page)
+        source = "dom"
+    else:
+        # The embedded record can lack a field (often the phone) that the
+        # rendered page shows; PLACE_JS collected both in the same call
+        dom = _dom_record(page)
+        filled = [field for field in DOM_FILL_FIELDS if not record[field] and dom[field]]
+        for field in filled:
+            record[field] = dom[field]
+        if filled:
+            metrics.count("extract_dom_fill")
+
+    if not record["name"]:
+        record["name"] = page["urlName"] or extract_name_from_url(url)
+    record["url"] = url
+    record["source"] = source
+
+    metrics.count(f"extract_{source}")
+    with _stats_lock:
+        extraction_stats[source] += 1
+        if page["loadMs"] is not None:
+            page_stats["pages"] += 1
+            page_stats["load_ms"] += page["loadMs"]
+            page_stats["bytes"] += page["bytes"]
+            page_times.append(page["loadMs"])
+    return record
+
+
+def reset_stats():
+    """Zeroes the counters at the start of a run (Streamlit keeps modules loaded between runs)."""
+    with _stats_lock:
+        for stats in (extraction_stats, page_stats):
+            for key in stats:
+                stats[key] = 0
+        page_times.clear()
+
+
+def extraction_summary():
+    total = extraction_stats["embedded"] + extraction_stats["dom"]
+    share = extraction_stats["dom"] / total * 100 if total else 0.0
+    return (
+        f"🧬 Extraction: {extraction_stats['embedded']} embedded, "
+        f"{extraction_stats['dom']} DOM fallback ({share:.0f}% fallback)"
+    )
@@ -0,0 +1,121 @@
+# =====================================================
+# RUN-WIDE PLACE IDENTITY & QUERY PLANNING
+# =====================================================
+# The same dealer turns up under "authorized dealer", "distributor" and
+# "showroom" for one city, each time with a slightly different link. The
+# /maps/place/…/data= part of the link carries the place's feature id
+# (!1s0x…:0x…), which is stable, so that is what identifies a place here.
+# Links are filtered against everything seen earlier in the run *before*
+# any driver.get, and the planner drops empty or repeated keywords so the
+# searches themselves are not duplicated either.
+import re
+import threading
+import urllib.parse
+
+from gazetteer import canonical
+
+FEATURE_ID_PATTERN = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.IGNORECASE)
+PLACE_ID_PATTERN = re.compile(r"!19s(ChIJ[\w-]+)")
+COORDS_PATTERN = re.compile(r"!3d(-?\d+\.\d+)!4d(-?\d+\.\d+)")
+NAME_PATTERN = re.compile(r"/maps/place/([^/]+)")
+
+
+def canonical_place_id(url):
+    """
+    Stable identity of a place link: the feature id if the data= blob has one,
+    else the Places id, else name + coordinates (6 decimals, ~0.1 m), else the
+    link without its query string.
+    """
+    if not url:
+        return None
+    match = FEATURE_ID_PATTERN.search(url)
+    if match:
+        return match.group(1).lower()
+    match = PLACE_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+
+    base = url.split("?", 1)[0]
+    coords = COORDS_PATTERN.search(base)
+    name = NAME_PATTERN.search(base)
+    if coords and name:
+        label = urllib.parse.unquote_plus(name.group(1)).strip().lower()
+        return f"{label}@{float(coords.group(1)):.6f},{float(coords.group(2)):.6f}"
+    return base
+
+
+class RunSeen:
+    """
+    Places already handled in this run, shared by every query (and worker
+    thread). `known` pre-loads place ids, e.g. those a resumed job's journal
+    has already extracted.
+    """
+
+    def __init__(self, known=()):
+        self._ids = set(known)
+        self._lock = threading.Lock()
+        self.visits_avoided = 0
+
+    def claim(self, urls):
+        """Returns the links whose place has not been seen yet (first link per place)."""
+        fresh = []
+        with self._lock:
+            for url in urls:
+                place_id = canonical_place_id(url)
+                if place_id in self._ids:
+                    self.visits_avoided += 1
+                    continue
+                self._ids.add(place_id)
+                fresh.append(url)
+        return fresh
+
+    def fresh(self, urls):
+        """Like claim(), without claiming: pick what to use, then claim() only that."""
+        fresh, batch = [], set()
+        with self._lock:
+            for url in urls:
+                place_id = canonical_place_id(url)
+                if place_id in self._ids or place_id in batch:
+                    continue
+                batch.add(place_id)
+                fresh.append(url)
+        return fresh
+
+    def __len__(self):
+        return len(self._ids)
+
+    def summary(self):
+        return f"♻️ Dedup: {len(self._ids)} distinct places, {self.visits_avoided} repeat visits avoided"
+
+
+# ================= QUERY PLANNING =================
+def clean_keywords(keywords):
+    """Accepts the raw comma-separated text box or a list; drops blanks and case-insensitive repeats."""
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    planned = []
+    seen = set()
+    for keyword in keywords:
+        keyword = " ".join(keyword.split())
+        if keyword and keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            planned.append(keyword)
+    return planned
+
+
+def plan_queries(business_name, keywords, cities):
+    """
+    [(query, city, keyword), ...] with blank/repeated keywords and repeated
+    cities (including alternative spellings like Ara/Arrah) removed.
+    """
+    keywords = clean_keywords(keywords)
+    planned = []
+    seen_cities = set()
+    for city in cities:
+        city_name = canonical(city.strip())
+        if not city_name or city_name in seen_cities:
+            continue
+        seen_cities.add(city_name)
+        for keyword in keywords:
+            planned.append((f"{business_name} {keyword} {city_name}", city_name, keyword))
+    return planned
@@ -0,0 +1,209 @@
+# =====================================================
+# ASYNC PLAYWRIGHT ENGINE
+# =====================================================
+# The Selenium path drives one page at a time and blocks on every command.
+# This engine runs search -> scroll -> extract on asyncio: one browser, one
+# context, many pages in flight, bounded by a semaphore. Waits are awaited
+# (selectors, the feed's MutationObserver), never slept.
+#
+# The page scripts are the same ones the Selenium path injects (CARDS_JS,
+# PLACE_JS, PROBE_JS), so both engines read Maps identically.
+import asyncio
+import fnmatch
+import time
+
+from playwright.async_api import async_playwright, TimeoutError as PWTimeout
+
+from cdp_capture import MAPS_BASE_URL
+from feed_scroll import END_OF_LIST_TEXT, PROBE_JS, STEP_TIMEOUT
+from lean_profile import BLOCKED_URL_PATTERNS
+from place_extract import CARDS_JS, PLACE_JS, partition_cards, place_from_page
+from run_metrics import metrics
+
+DEFAULT_CONCURRENCY = 6
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+# Selenium scripts are function bodies reading `arguments`; Playwright wants
+# a function expression. Wrapping keeps `arguments` and `return` working, and
+# hands async scripts their completion callback as the last argument.
+def _sync_script(body):
+    return f"(args) => (function() {{ {body} }}).apply(null, args)"
+
+
+def _async_script(body):
+    return f"(args) => new Promise(done => (function() {{ {body} }}).apply(null, args.concat([done])))"
+
+
+PW_CARDS_JS = _sync_script(CARDS_JS)
+PW_PLACE_JS = _sync_script(PLACE_JS)
+PW_PROBE_JS = _async_script(PROBE_JS)
+
+
+async def _lean_route(route):
+    """Lean mode for Playwright: block by resource type, plus the same URL patterns as Selenium."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+        fnmatch.fnmatch(request.url, pattern) for pattern in BLOCKED_URL_PATTERNS
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# ================= SEARCH =================
+async def _scroll_feed(page, feed, max_steps=None, step_timeout=STEP_TIMEOUT):
+    steps = 0
+    while max_steps is None or steps < max_steps:
+        steps += 1
+        start = time.perf_counter()
+        probe = await page.evaluate(PW_PROBE_JS, [feed, int(step_timeout * 1000), END_OF_LIST_TEXT])
+        metrics.add("scroll_step", time.perf_counter() - start)
+        if probe["end"] or probe["height"] == probe["heightBefore"]:
+            break
+    return steps
+
+
+async def search_cards(context, semaphore, query, base_url=MAPS_BASE_URL, max_steps=None):
+    """Opens the results feed for `query`, scrolls it to the end and returns the harvested cards."""
+    async with semaphore:
+        page = await context.new_page()
+        try:
+            start = time.perf_counter()
+            await page.goto(f"{base_url}/maps/search/{query.replace(' ', '+')}", wait_until="domcontentloaded")
+            metrics.add("search_nav", time.perf_counter() - start)
+            start = time.perf_counter()
+            try:
+                feed = await page.wait_for_selector("div[role='feed']", timeout=10_000)
+            except PWTimeout:
+                return []
+            finally:
+                metrics.add("feed_wait", time.perf_counter() - start)
+            await _scroll_feed(page, feed, max_steps)
+            start = time.perf_counter()
+            cards = await page.evaluate(PW_CARDS_JS, []) or []
+            metrics.add("link_harvest", time.perf_counter() - start)
+            return cards
+        finally:
+            await page.close()
+
+
+# ================= PLACE PAGES =================
+async def extract_place(context, semaphore, url, wait_ms=6_000, cache=None, city=None):
+    """
+    Async twin of place_extract.extract_place; returns None if the page fails
+    to load. A place_cache.PlaceCache hit skips the page entirely.
+    """
+    if cache is not None:
+        place = cache.get(url)
+        if place is not None:
+            return place
+
+    async with semaphore:
+        page = await context.new_page()
+        try:
+            start = time.perf_counter()
+            await page.goto(url, wait_until="domcontentloaded")
+            try:
+                await page.wait_for_selector("h1", timeout=wait_ms)
+            except PWTimeout:
+                pass  # PLACE_JS still reads the embedded data / URL
+            metrics.add("place_nav", time.perf_counter() - start)
+            start = time.perf_counter()
+            place = place_from_page(await page.evaluate(PW_PLACE_JS, []), url)
+            metrics.add("extract", time.perf_counter() - start)
+            if cache is not None:
+                cache.put(url, place, city)
+            return place
+        except Exception:
+            return None
+        finally:
+            await page.close()
+
+
+# ================= RUN =================
+async def scrape_queries(
+    queries,
+    clean_phone,
+    concurrency=DEFAULT_CONCURRENCY,
+    lean=False,
+    card_mode=True,
+    headless=False,
+    base_url=MAPS_BASE_URL,
+    max_steps=None,
+    max_details=None,
+    on_place=None,
+    seen=None,
+    cache=None,
+):
+    """
+    Runs every query through one browser with at most `concurrency` pages open.
+    A query's place pages start as soon as its own search finishes, so searches
+    and detail pages overlap. Returns {query: [place, ...]}; card leads carry a
+    cleaned phone, detail-page leads a raw one (as in the Selenium path).
+    on_place(query, place) is called on the event loop thread as results arrive.
+    seen (place_ids.RunSeen) drops places another query already produced
+    before their pages are opened; cache (place_cache.PlaceCache) serves
+    places fetched on earlier runs.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {query: [] for query in queries}
+
+    def keep(query, place):
+        results[query].append(place)
+        if on_place:
+            on_place(query, place)
+
+    async with async_playwright() as pw:
+        with metrics.stage("driver_startup"):
+            browser = await pw.chromium.launch(
+                headless=headless, args=["--disable-blink-features=AutomationControlled"]
+            )
+        context = await browser.new_context(locale="en-US")
+        if lean:
+            await context.route("**/*", _lean_route)
+
+        async def run_query(query):
+            cards = await search_cards(context, semaphore, query, base_url, max_steps)
+            if seen is not None:
+                fresh = set(seen.fresh(card["url"] for card in cards))
+                cards = [card for card in cards if card["url"] in fresh]
+            if card_mode:
+                complete, urls = partition_cards(cards, clean_phone)
+            else:
+                complete, urls = [], list(dict.fromkeys(card["url"] for card in cards))
+            if max_details is not None:
+                urls = urls[:max_details]
+            if seen is not None:
+                # Claim only the cards taken and the pages opened: places past
+                # max_details stay open to the other queries
+                claimed = set(seen.claim([card["url"] for card in complete] + urls))
+                complete = [card for card in complete if card["url"] in claimed]
+                urls = [url for url in urls if url in claimed]
+            for card in complete:
+                keep(query, card)
+
+            city = query.split()[-1]
+            pending = [extract_place(context, semaphore, url, cache=cache, city=city) for url in urls]
+            for place in asyncio.as_completed(pending):
+                place = await place
+                if place:
+                    keep(query, place)
+
+        try:
+            await asyncio.gather(*(run_query(query) for query in queries))
+        finally:
+            await context.close()
+            await browser.close()
+    return results
+
+
+def run_queries(queries, clean_phone, **kwargs):
+    """
+    Blocking entry point for the scripts and Streamlit apps (no event loop of
+    their own). Same arguments as scrape_queries; also returns the elapsed
+    seconds so callers can report places/minute.
+    """
+    start = time.perf_counter()
+    results = asyncio.run(scrape_queries(queries, clean_phone, **kwargs))
+    return results, time.perf_counter() - start
@@ -0,0 +1,140 @@
+# =====================================================
+# STREAMING RESULT SINK (SQLITE)
+# =====================================================
+# Saving progress used to re-read the whole .xlsx, concatenate, dedupe and
+# rewrite it after every query, which gets slower with every row already in
+# the file. The sink appends each batch to a SQLite table keyed by place
+# (canonical id of the URL), so a re-sighting replaces its row instead of
+# adding one, and a batch costs the same at row 100 and row 100,000. The
+# Excel file is written from the table once, at the end or on demand:
+#
+#     python result_sink.py MRF_Distributors_Rajasthan.sqlite
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from place_ids import canonical_place_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    place_id   TEXT PRIMARY KEY,
+    url        TEXT,
+    updated_at REAL NOT NULL,
+    data       TEXT NOT NULL
+);
+"""
+
+
+def sink_path(excel_path):
+    """The sink lives next to the workbook it materializes."""
+    return os.path.splitext(excel_path)[0] + ".sqlite"
+
+
+class ResultSink:
+    """
+    sink = ResultSink("leads.sqlite", url_key="URL")
+    sink.write(rows)               # per batch; returns (new, replaced, ms)
+    sink.materialize("leads.xlsx")
+    sink.close()
+
+    A new sink is seeded once from `seed_excel` if that workbook exists, so
+    runs that used to append to the .xlsx keep their earlier rows.
+    """
+
+    def __init__(self, path, url_key="URL", seed_excel=None):
+        self.path = path
+        self.url_key = url_key
+        self.latencies = []
+        self.stats = {"batches": 0, "new": 0, "replaced": 0}
+
+        is_new = not os.path.exists(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        if is_new and seed_excel and os.path.exists(seed_excel):
+            seed = pd.read_excel(seed_excel)
+            with self._lock:
+                self._insert(seed.astype(object).where(seed.notna(), None).to_dict("records"))
+
+    def _insert(self, rows):
+        """Upserts rows by place; returns how many places were new. Caller holds the lock."""
+        new = 0
+        now = time.time()
+        for row in rows:
+            url = row.get(self.url_key)
+            place_id = canonical_place_id(url) or json.dumps(row, sort_keys=True, default=str)
+            exists = self._db.execute("SELECT 1 FROM rows WHERE place_id = ?", (place_id,)).fetchone()
+            # keep the row's first position, take its latest values
+            self._db.execute(
+                "INSERT INTO rows VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(place_id) DO UPDATE SET url = excluded.url, "
+                "updated_at = excluded.updated_at, data = excluded.data",
+                (place_id, url, now, json.dumps(row, ensure_ascii=False, default=str)),
+            )
+            new += exists is None
+        self._db.commit()
+        return new
+
+    def write(self, rows):
+        """Appends one batch; returns (new rows, replaced rows, milliseconds)."""
+        rows = list(rows)
+        if not rows:
+            return 0, 0, 0.0
+        start = time.perf_counter()
+        with self._lock:
+            new = self._insert(rows)
+            ms = (time.perf_counter() - start) * 1000
+            self.latencies.append(ms)
+            self.stats["batches"] += 1
+            self.stats["new"] += new
+            self.stats["replaced"] += len(rows) - new
+        return new, len(rows) - new, ms
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM rows").fetchone()
+        return count
+
+    def frame(self):
+        """Every stored row, in the order places were first saved."""
+        with self._lock:
+            records = [json.loads(data) for (data,) in self._db.execute("SELECT data FROM rows ORDER BY rowid")]
+        return pd.DataFrame(records)
+
+    def materialize(self, excel_path):
+        """Writes the workbook from the table; returns the number of rows written."""
+        df = self.frame()
+        if df.empty:
+            return 0
+        df.to_excel(excel_path, index=False)
+        return len(df)
+
+    def summary(self):
+        s = self.stats
+        if not self.latencies:
+            return "💾 Sink: no batches written"
+        return (
+            f"💾 Sink: {s['batches']} batches, {s['new']} new rows, {s['replaced']} re-sightings replaced | "
+            f"write p50 {statistics.median(self.latencies):.1f} ms, max {max(self.latencies):.1f} ms"
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+if __name__ == "__main__":
+    # On-demand export of a sink while (or after) a run writes to it
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".xlsx"
+    sink = ResultSink(source)
+    print(f"📤 Wrote {sink.materialize(target)} rows to {target}")
+    sink.close()
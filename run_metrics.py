@@ -0,0 +1,153 @@
+# =====================================================
+# PER-STAGE TIMERS AND COUNTERS
+# =====================================================
+# Where do the minutes go on a 300-city run? Every stage of the pipeline
+# adds its elapsed time here (driver startup, search navigation, feed wait,
+# scroll steps, link harvest, place navigation, extraction, save) and the
+# extraction path counts which method served each place. One registry per
+# process, like place_extract's stats: worker and job-service processes ship
+# snapshots to the app, where combine() adds them up.
+#
+#   with metrics.stage("search_nav"):
+#       driver.get(url)
+#   metrics.count("extract_embedded")
+#   path = write_run(metrics.snapshot(), "fi")   # one JSON file per run
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+from driver_bootstrap import BOOTSTRAP_DIR
+
+METRICS_DIR = os.path.join(BOOTSTRAP_DIR, "metrics")
+PUBLISH_INTERVAL = 2.0  # seconds between snapshots sent to the app
+
+# Display order and labels; stages not listed here are shown after these
+STAGES = {
+    "driver_startup": "Driver startup",
+    "search_nav": "Search navigation",
+    "feed_wait": "Feed wait",
+    "scroll_step": "Scroll steps",
+    "link_harvest": "Link / card harvest",
+    "place_nav": "Place navigation",
+    "extract": "Extraction",
+    "save": "Save",
+}
+
+
+class StageMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zeroes everything at the start of a run (Streamlit keeps modules loaded between runs)."""
+        with self._lock:
+            self._stages = {}    # name -> [count, seconds, max seconds]
+            self._counters = {}
+            self._started = time.time()
+
+    def add(self, stage, seconds, count=1):
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds / count if count else seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Plain dict (picklable, JSON-able) of everything recorded since reset()."""
+        with self._lock:
+            return {
+                "started": self._started,
+                "wall": time.time() - self._started,
+                "stages": {name: {"count": c, "seconds": s, "max": m} for name, (c, s, m) in self._stages.items()},
+                "counters": dict(self._counters),
+            }
+
+
+metrics = StageMetrics()
+
+
+def combine(*snapshots):
+    """Adds up snapshots from several processes; wall time is the longest one."""
+    merged = {"started": None, "wall": 0.0, "stages": {}, "counters": {}}
+    for snap in snapshots:
+        if not snap:
+            continue
+        merged["started"] = min(filter(None, (merged["started"], snap["started"])))
+        merged["wall"] = max(merged["wall"], snap["wall"])
+        for name, stage in snap["stages"].items():
+            entry = merged["stages"].setdefault(name, {"count": 0, "seconds": 0.0, "max": 0.0})
+            entry["count"] += stage["count"]
+            entry["seconds"] += stage["seconds"]
+            entry["max"] = max(entry["max"], stage["max"])
+        for name, n in snap["counters"].items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + n
+    return merged
+
+
+def _ordered(stages):
+    return sorted(stages, key=lambda name: (list(STAGES).index(name) if name in STAGES else len(STAGES), name))
+
+
+def breakdown(snapshot):
+    """One row per stage for a table: count, total and average time, share of all timed work."""
+    if not snapshot or not snapshot["stages"]:
+        return []
+    timed = sum(stage["seconds"] for stage in snapshot["stages"].values()) or 1.0
+    rows = []
+    for name in _ordered(snapshot["stages"]):
+        stage = snapshot["stages"][name]
+        rows.append({
+            "Stage": STAGES.get(name, name),
+            "Count": stage["count"],
+            "Total (s)": round(stage["seconds"], 1),
+            "Avg (ms)": round(stage["seconds"] / stage["count"] * 1000) if stage["count"] else 0,
+            "Max (ms)": round(stage["max"] * 1000),
+            "Share": f"{stage['seconds'] / timed * 100:.0f}%",
+        })
+    return rows
+
+
+def stage_summary(snapshot):
+    rows = sorted(breakdown(snapshot), key=lambda row: -row["Total (s)"])[:4]
+    if not rows:
+        return "📈 Stages: nothing timed"
+    top = ", ".join(f"{row['Stage'].lower()} {row['Share']} ({row['Count']}x)" for row in rows)
+    counters = ", ".join(f"{name} {n}" for name, n in sorted(snapshot["counters"].items()))
+    return f"📈 Stages: {top} | {snapshot['wall']:.0f}s wall" + (f" | {counters}" if counters else "")
+
+
+def write_run(snapshot, label):
+    """Writes the run's metrics to METRICS_DIR/<label>-<time>.json and returns the path."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    stamp = datetime.datetime.fromtimestamp(snapshot["started"] or time.time()).strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(METRICS_DIR, f"{label}-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(snapshot, label=label, breakdown=breakdown(snapshot)), f, indent=2)
+    return path
+
+
+def show_breakdown(placeholder, snapshot):
+    """Live panel for the Streamlit apps: renders breakdown() into an st.empty() placeholder."""
+    rows = breakdown(snapshot)
+    if not rows:
+        return
+    box = placeholder.container()
+    box.dataframe(rows, hide_index=True, use_container_width=True)
+    counters = " · ".join(f"{name}: {n}" for name, n in sorted(snapshot["counters"].items()))
+    box.caption(f"{snapshot['wall']:.0f}s wall" + (f" · {counters}" if counters else ""))
@@ -0,0 +1,143 @@
+# =====================================================
+# SCHEDULER JOB (RUNS IN THE JOB SERVICE)
+# =====================================================
+# effi.py's run as a job_service job: the WorkScheduler's worker processes
+# (or the Playwright engine) are started from the service process, so
+# reruns of the Streamlit script never touch them. Leads, log events and
+# per-stage metrics come back through `job`; a pause holds every worker
+# between tasks and a cancel stops the workers and quits their browsers.
+#
+# spec = {
+#     "business": "MRF", "cities": [...], "keywords": [...],
+#     "engine": "selenium" | "playwright", "card_mode": True, "lean": True,
+#     "force_refresh": False, "tiled": False,
+#     "workers": 4, "adaptive": True, "playwright_pages": 6,
+# }
+import time
+
+from lead_index import clean_phone
+from place_cache import PlaceCache
+from place_extract import extraction_summary, reset_stats
+from place_ids import RunSeen, plan_queries
+from pw_engine import run_queries
+from run_metrics import PUBLISH_INTERVAL, metrics, stage_summary, write_run
+from work_scheduler import DEFAULT_WORKERS, WorkScheduler
+from worker_controller import WorkerController
+
+
+def run(spec, job):
+    # Repeated cities/keywords dropped
+    tasks = plan_queries(spec["business"], spec["keywords"], spec["cities"])
+    # Places already handled by an earlier task; filtered before any page load
+    seen = RunSeen()
+    reset_stats()
+    # Per-stage timers; the selenium branch adds every worker's via the scheduler
+    metrics.reset()
+    job.log(f"🚀 Initializing {len(tasks)} search tasks...")
+    job.progress(0, len(tasks))
+
+    if spec.get("engine") == "playwright":
+        stage_snapshot = _run_playwright(spec, job, tasks, seen)
+    else:
+        stage_snapshot = _run_scheduler(spec, job, tasks, seen)
+
+    job.log(seen.summary())
+    snapshot = stage_snapshot()
+    job.emit("metrics", snapshot)
+    job.log(stage_summary(snapshot))
+    job.log(f"📈 Metrics written to {write_run(snapshot, 'effi')}")
+    job.log("🏁 ALL TASKS COMPLETE")
+
+
+def _save(job, lead):
+    with metrics.stage("save"):
+        job.result(lead)
+
+
+def _run_scheduler(spec, job, tasks, seen):
+    # Worker processes, each with its own Chrome (and place cache), pull
+    # searches and individual place pages from shared queues.
+    # 3 scroll steps and 5 place pages per search, as before; tiles scroll to the end.
+    # Adaptive: starts at DEFAULT_WORKERS and moves one worker at a time
+    # within [1, max], logging each change and its reason
+    n_workers = spec.get("workers", DEFAULT_WORKERS)
+    controller = None
+    if spec.get("adaptive", True):
+        controller = WorkerController(start=min(DEFAULT_WORKERS, n_workers), max_workers=n_workers)
+    scheduler = WorkScheduler(
+        workers=n_workers, lean=spec.get("lean", True), card_mode=spec.get("card_mode", True),
+        force_refresh=spec.get("force_refresh", False), max_steps=3, max_details=5, controller=controller
+    )
+    published = time.monotonic()
+    events = scheduler.run(tasks, seen, spec["business"], tiled=spec.get("tiled", False))
+    try:
+        for event, payload in events:
+            held = job.paused
+            if held:
+                scheduler.hold()
+            job.checkpoint()  # blocks while paused; raises JobCancelled on cancel
+            if held:
+                scheduler.release()
+            if event == "lead":
+                _save(job, payload)
+            elif event == "log":
+                job.add(payload)
+            elif event == "progress":
+                searches_done, searches, pages_done, pages = payload
+                job.progress(searches_done, searches, f"· {pages_done}/{pages} place pages")
+            if time.monotonic() - published > PUBLISH_INTERVAL:
+                job.emit("metrics", scheduler.stage_metrics())
+                published = time.monotonic()
+    finally:
+        # Cancelling lands here: closing run() stops the workers and their browsers
+        events.close()
+        for plan in scheduler.plans:
+            job.log(f"{plan.query}: {plan.summary()}", stage="search", query=plan.query)
+        for report in scheduler.reports:
+            job.log(report)
+        job.log(scheduler.summary())
+    return scheduler.stage_metrics
+
+
+def _run_playwright(spec, job, tasks, seen):
+    # Places scraped by earlier runs are served from disk instead of reopened
+    cache = PlaceCache(force_refresh=spec.get("force_refresh", False))
+    # One async browser runs every task; same limits as the Selenium workers
+    # (3 scroll steps, 5 place pages per query)
+    task_info = {query: (city, key) for query, city, key in tasks}
+    published = [time.monotonic()]
+
+    def on_place(query, place):
+        # runs on the event loop: a pause holds every page, a cancel unwinds the browser
+        job.checkpoint()
+        city, key = task_info[query]
+        clean = clean_phone(place["phone"])
+        if clean:
+            _save(job, {
+                "Company": place["name"],
+                "Phone": clean,
+                "City": city,
+                "Keyword": key,
+                "Source_Link": place["url"]
+            })
+        if time.monotonic() - published[0] > PUBLISH_INTERVAL:
+            job.emit("metrics", metrics.snapshot())
+            published[0] = time.monotonic()
+
+    pages = spec.get("playwright_pages", 6)
+    job.log(f"🎭 Playwright engine: {pages} pages in flight", stage="scale")
+    try:
+        results, seconds = run_queries(
+            list(task_info), clean_phone, concurrency=pages, lean=spec.get("lean", True),
+            card_mode=spec.get("card_mode", True), max_steps=3, max_details=5, on_place=on_place, seen=seen,
+            cache=cache
+        )
+        total = sum(len(places) for places in results.values())
+        job.log(f"⏱️ {total} places in {seconds:.0f}s ({total / max(seconds, 1) * 60:.1f} places/min)",
+                stage="extract", duration=seconds)
+        job.progress(len(tasks), len(tasks))
+    finally:
+        job.log(extraction_summary())
+        job.log(cache.summary())
+        cache.close()
+    return metrics.snapshot
@@ -0,0 +1,194 @@
+# =====================================================
+# SCRAPE JOB (RUNS IN THE JOB SERVICE)
+# =====================================================
+# The search -> scroll -> cards -> place pages flow the Streamlit apps used
+# to run inline, as a job_service job. It owns its browser (or Playwright
+# engine), journal and place cache, reports through `job` and checks
+# job.checkpoint() between queries, scroll steps and place pages, so pause
+# and cancel take effect within one step and cancel quits the browser.
+#
+# spec = {
+#     "business": "MRF", "cities": [...], "keywords": [...],
+#     "engine": "selenium" | "playwright", "card_mode": True, "lean": True,
+#     "detail_tabs": 4, "playwright_pages": 6, "force_refresh": False, "resume": True,
+# }
+import time
+
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from crawl_journal import CrawlJournal, job_key
+from driver_bootstrap import launch_chrome, startup_summary
+from driver_pool import DriverPool
+from feed_scroll import scroll_feed
+from job_service import JobCancelled
+from lead_index import clean_phone
+from lean_profile import apply_lean_options, enable_lean_blocking, lean_report
+from place_cache import PlaceCache
+from place_extract import extraction_summary, harvest_cards, page_stats, partition_cards, reset_stats
+from place_ids import RunSeen, plan_queries
+from pw_engine import run_queries
+from run_metrics import PUBLISH_INTERVAL, metrics, stage_summary, write_run
+from tab_pipeline import extract_in_tabs
+
+
+def setup_driver(lean=False):
+    options = Options()
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--start-maximized")
+    options.add_argument("--log-level=3")
+    if lean:
+        apply_lean_options(options)
+    driver = launch_chrome(options)
+    if lean:
+        enable_lean_blocking(driver)
+    return driver
+
+
+def run(spec, job):
+    business_name = spec["business"]
+    lean_mode = spec.get("lean", True)
+    tasks = plan_queries(business_name, spec["keywords"], spec["cities"])
+
+    # Finished queries and extracted places are journaled as they happen,
+    # so a cancelled or crashed job picks up where it stopped
+    journal = CrawlJournal(job_key(business_name, spec["cities"], spec["keywords"]), resume=spec.get("resume", True))
+    for lead in journal.leads:
+        job.result(lead)
+    # Places already handled by an earlier query (or attempt); filtered before any page load
+    seen = RunSeen(journal.place_ids)
+    # Places scraped by earlier runs are served from disk instead of reopened
+    cache = PlaceCache(force_refresh=spec.get("force_refresh", False))
+    reset_stats()
+    # Per-stage timers; the app's breakdown panel gets a snapshot every PUBLISH_INTERVAL.
+    # One registry per process, so with MAX_JOBS > 1 concurrent jobs share it.
+    metrics.reset()
+    published = [time.monotonic()]
+
+    def publish(force=False):
+        if force or time.monotonic() - published[0] > PUBLISH_INTERVAL:
+            job.emit("metrics", metrics.snapshot())
+            published[0] = time.monotonic()
+
+    todo = [task for task in tasks if not journal.is_query_done(task[1], task[2])]
+    done = len(tasks) - len(todo)
+    job.log(f"🚀 {len(tasks)} queries, {done} already done")
+    job.progress(done, len(tasks))
+
+    def save_lead(name, phone, city, key, url):
+        with metrics.stage("save"):
+            if phone:
+                lead = {"Company": name, "Phone": phone, "City": city, "Keyword": key, "Link": url}
+                journal.record_place(url, lead)
+                job.result(lead)
+            else:
+                journal.record_place(url)
+                job.log(f"   [-] No number: {name}", stage="save", place=url)
+        publish()
+
+    try:
+        if spec.get("engine") == "playwright":
+            _run_playwright(spec, job, todo, save_lead, seen, cache, journal, len(tasks))
+        else:
+            _run_selenium(spec, job, todo, save_lead, publish, seen, cache, journal, done, len(tasks))
+        job.log("🏁 WORK COMPLETE")
+    finally:
+        job.log(startup_summary())
+        job.log(extraction_summary())
+        job.log(lean_report(lean_mode, page_stats))
+        job.log(seen.summary())
+        job.log(cache.summary())
+        cache.close()
+        journal.close()
+        job.log(journal.summary())
+        publish(force=True)
+        snapshot = metrics.snapshot()
+        job.log(stage_summary(snapshot))
+        job.log(f"📈 Metrics written to {write_run(snapshot, 'job')}")
+
+
+def _run_selenium(spec, job, todo, save_lead, publish, seen, cache, journal, done, total):
+    lean_mode = spec.get("lean", True)
+    pool = DriverPool(lambda: setup_driver(lean=lean_mode), max_size=1)
+    try:
+        with pool.lease() as driver:
+            for query, city, key in todo:
+                job.checkpoint()
+                job.progress(done, total, query)
+                job.log(f"🔎 Searching: {query}", stage="search", query=query)
+                with metrics.stage("search_nav"):
+                    driver.get(f"https://www.google.com/maps/search/{query.replace(' ', '+')}")
+
+                try:
+                    with metrics.stage("feed_wait"):
+                        feed = WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']"))
+                        )
+                    scroll = scroll_feed(driver, feed, on_step=lambda probe: job.checkpoint())
+                    job.log(f"   ⏱️ Scrolled {scroll['steps']} steps in {scroll['seconds']:.1f}s",
+                            stage="scroll", query=query, duration=scroll["seconds"])
+
+                    if spec.get("card_mode", True):
+                        # Cards that already show a phone are saved without opening the place page
+                        cards = harvest_cards(driver)
+                        fresh = set(seen.claim(card["url"] for card in cards))
+                        cards = [card for card in cards if card["url"] in fresh]
+                        complete, urls = partition_cards(cards, clean_phone)
+                        for card in complete:
+                            save_lead(card["name"], card["phone"], city, key, card["url"])
+                        job.log(f"   ✅ Found {len(cards)} locations, {len(complete)} from cards. {len(urls)} to open...",
+                                stage="harvest", query=query)
+                    else:
+                        with metrics.stage("link_harvest"):
+                            links = driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc")
+                            hrefs = set(link.get_attribute("href") for link in links)
+                        urls = seen.claim(hrefs)
+                        job.log(f"   ✅ Found {len(urls)} locations. extracting details...", stage="harvest", query=query)
+
+                    # Cached places come back first; the rest load side by side in tabs
+                    pages = extract_in_tabs(
+                        driver, urls, n_tabs=spec.get("detail_tabs", 4), lean=lean_mode, cache=cache, city=city
+                    )
+                    for url, place in pages:
+                        job.checkpoint()
+                        if place is not None:
+                            save_lead(place["name"], clean_phone(place["phone"]), city, key, url)
+
+                    journal.record_query(city, key)
+                except JobCancelled:
+                    raise
+                except Exception:
+                    job.log(f"⚠️ Search failed for {query}", level="warning", stage="search", query=query)
+
+                done += 1
+                job.progress(done, total, query)
+                publish()
+    finally:
+        # Cancelling lands here right away: the browser goes with the job
+        job.log(pool.summary())
+        pool.close()
+
+
+def _run_playwright(spec, job, todo, save_lead, seen, cache, journal, total):
+    queries = {query: (city, key) for query, city, key in todo}
+
+    def on_place(query, place):
+        # runs on the event loop: a pause holds every page, a cancel unwinds the browser
+        job.checkpoint()
+        city, key = queries[query]
+        save_lead(place["name"], clean_phone(place["phone"]), city, key, place["url"])
+
+    pages = spec.get("playwright_pages", 6)
+    job.log(f"🎭 Playwright: {pages} pages in flight")
+    results, seconds = run_queries(
+        list(queries), clean_phone, concurrency=pages, lean=spec.get("lean", True),
+        card_mode=spec.get("card_mode", True), on_place=on_place, seen=seen, cache=cache
+    )
+    for city, key in queries.values():
+        journal.record_query(city, key)
+    found = sum(len(places) for places in results.values())
+    job.log(f"   ⏱️ {found} places in {seconds:.0f}s ({found / max(seconds, 1) * 60:.1f} places/min)",
+            stage="extract", duration=seconds)
+    job.progress(total, total)
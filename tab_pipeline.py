@@ -0,0 +1,106 @@
+# =====================================================
+# MULTI-TAB DETAIL PAGE PIPELINE
+# =====================================================
+# driver.get() blocks until a place page has loaded, so one tab leaves the
+# browser idle on the network most of the time. Here N tabs of the same
+# Chrome each get a navigation started (without waiting), and whichever tab
+# shows its h1 first is harvested and handed the next URL.
+import time
+
+from lean_profile import enable_lean_blocking
+from place_extract import extract_place
+from run_metrics import metrics
+
+# The old document is tagged before navigating away, so a tab only counts as
+# ready once the *new* place page has replaced it and rendered its title.
+START_NAVIGATION_JS = """
+window.__wellsurePending = true;
+window.location.href = arguments[0];
+"""
+
+TAB_READY_JS = """
+return !window.__wellsurePending
+    && document.readyState !== "loading"
+    && !!document.querySelector("h1");
+"""
+
+POLL_INTERVAL = 0.05
+
+
+def extract_in_tabs(driver, urls, n_tabs=4, timeout=15, lean=False, cache=None, city=None):
+    """
+    Generator yielding (url, place) in completion order; place is None when the
+    page did not load within `timeout` seconds or extraction failed.
+    With a place_cache.PlaceCache, cached places are yielded first without any
+    navigation and freshly extracted ones are written back (tagged with `city`).
+    Extra tabs are closed again and the original tab is left focused.
+    """
+    if cache is not None:
+        cached, urls = cache.split(urls)
+        for place in cached:
+            yield place["url"], place
+
+    queue = list(urls)
+    queue.reverse()  # pop() from the end keeps the original order
+    home = driver.current_window_handle
+    handles = [home]
+    for _ in range(min(n_tabs, len(urls)) - 1):
+        driver.switch_to.new_window("tab")
+        if lean:
+            enable_lean_blocking(driver)
+        handles.append(driver.current_window_handle)
+
+    in_flight = {}  # handle -> (url, started_at)
+
+    def start(handle):
+        url = queue.pop()
+        driver.switch_to.window(handle)
+        driver.execute_script(START_NAVIGATION_JS, url)
+        in_flight[handle] = (url, time.perf_counter())
+
+    try:
+        for handle in handles:
+            if queue:
+                start(handle)
+
+        while in_flight:
+            progressed = False
+            for handle in list(in_flight):
+                url, started_at = in_flight[handle]
+                driver.switch_to.window(handle)
+
+                try:
+                    ready = driver.execute_script(TAB_READY_JS)
+                except Exception:
+                    ready = False  # document mid-swap
+
+                place = None
+                if ready:
+                    # navigation started -> new place page rendered
+                    metrics.add("place_nav", time.perf_counter() - started_at)
+                    try:
+                        place = extract_place(driver, url, wait_seconds=0)
+                    except Exception:
+                        place = None
+                    if place is not None and cache is not None:
+                        cache.put(url, place, city)
+                elif time.perf_counter() - started_at < timeout:
+                    continue
+
+                del in_flight[handle]
+                progressed = True
+                yield url, place
+
+                if queue:
+                    start(handle)
+
+            if not progressed:
+                time.sleep(POLL_INTERVAL)
+    finally:
+        for handle in handles[1:]:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        driver.switch_to.window(home)
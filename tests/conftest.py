@@ -0,0 +1,5 @@
+# The modules live at the repository root, next to the Streamlit apps
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,29 @@
+from event_log import EventLog, LogPanel
+
+
+class Placeholder:
+    def __init__(self):
+        self.drawn = []
+
+    def code(self, text, language=None):
+        self.drawn.append(text)
+
+
+def test_log_panel_redraws_only_for_new_events():
+    events = EventLog(100)
+    placeholder = Placeholder()
+    panel = LogPanel(placeholder, events, lines=5, min_interval=60)
+
+    events.log("🚀 started")
+    panel.notify()
+    panel.notify()
+    assert len(placeholder.drawn) == 1
+
+    # within the interval an info line waits for the next redraw...
+    events.log("lead found")
+    panel.notify()
+    assert len(placeholder.drawn) == 1
+
+    panel.flush()
+    assert "lead found" in placeholder.drawn[-1]
+    assert len(placeholder.drawn) == 2
@@ -0,0 +1,51 @@
+from live_table import LiveTable
+
+
+class Table:
+    def __init__(self, frame):
+        self.rows = len(frame)
+
+    def add_rows(self, frame):
+        self.rows += len(frame)
+
+
+class OldStreamlitPlaceholder:
+    """dataframe() returns an element that can append rows."""
+    element = Table
+
+    def __init__(self):
+        self.drawn = []
+
+    def dataframe(self, frame, **kwargs):
+        self.drawn.append(len(frame))
+        self.table = self.element(frame)
+        return self.table
+
+
+class NewStreamlitPlaceholder(OldStreamlitPlaceholder):
+    """Recent Streamlit releases dropped add_rows."""
+    element = type("Table", (), {"__init__": Table.__init__})
+
+
+def _fill(table, rows, count):
+    for i in range(count):
+        rows.append({"Company": f"C{i}"})
+        table.notify(force=True)
+
+
+def test_new_rows_are_appended_until_the_window_is_full():
+    placeholder = OldStreamlitPlaceholder()
+    rows = []
+    table = LiveTable(placeholder, rows, window=10)
+    _fill(table, rows, 12)
+    # first row drawn, 9 appended, the 11th redraws the newest 5, the 12th is appended
+    assert placeholder.drawn == [1, 5]
+    assert placeholder.table.rows == 6
+
+
+def test_without_add_rows_the_newest_window_is_redrawn():
+    placeholder = NewStreamlitPlaceholder()
+    rows = []
+    table = LiveTable(placeholder, rows, window=10)
+    _fill(table, rows, 12)
+    assert placeholder.drawn == list(range(1, 11)) + [10, 10]
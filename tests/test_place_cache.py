@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+import place_cache
+from place_cache import PlaceCache
+
+URL = "https://www.google.com/maps/place/MRF+Tyres/data=!4m7!3m6!1s0x3bc2c0a5d8f6e8a1:0x1a2b3c4d5e6f7a8b!8m2"
+
+
+def _place(phone):
+    return {"name": "MRF Tyres", "phone": phone, "address": "Station Rd", "source": "embedded"}
+
+
+def test_place_without_phone_expires_after_partial_ttl(tmp_path, monkeypatch):
+    cache = PlaceCache(path=str(tmp_path / "cache.sqlite"))
+    cache.put(URL, _place(None), "Kota")
+    assert cache.get(URL)["name"] == "MRF Tyres"
+
+    later = time.time() + place_cache.PARTIAL_TTL_HOURS * 3600 + 60
+    monkeypatch.setattr(place_cache.time, "time", lambda: later)
+    assert cache.get(URL) is None
+
+    # A re-fetch that found the phone is kept for the full TTL
+    cache.put(URL, _place("09876543210"), "Kota")
+    monkeypatch.setattr(place_cache.time, "time", lambda: later + place_cache.PARTIAL_TTL_HOURS * 3600 + 60)
+    assert cache.get(URL)["phone"] == "09876543210"
+    assert cache.stats["partial"] == 1
+    cache.close()
+
+
+def test_cache_without_expiry_column_is_migrated(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    db = sqlite3.connect(path)
+    db.executescript(place_cache.SCHEMA.replace(",\n    expires_at  REAL", ""))
+    now = time.time() - place_cache.PARTIAL_TTL_HOURS * 3600 - 60
+    db.execute("INSERT INTO places VALUES ('a', 'A', NULL, 'Kota', 'u', ?, ?, 'h', '{\"name\": \"A\"}')", (now, now))
+    db.execute("INSERT INTO places VALUES ('b', 'B', '0987', 'Kota', 'u', ?, ?, 'h', '{\"name\": \"B\"}')", (now, now))
+    db.commit()
+    db.close()
+
+    cache = PlaceCache(path=path)
+    rows = cache._db.execute("SELECT place_id FROM places ORDER BY place_id").fetchall()
+    assert rows == [("b",)]
+    cache.close()
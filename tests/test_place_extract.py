@@ -0,0 +1,45 @@
+import json
+import os
+
+from benchmarks.replay_server import load_records
+from place_extract import place_from_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "sample")
+URL = "https://www.google.com/maps/place/MRF+Tyres/data=!4m7!3m6!1s0x0:0x0!8m2!3d26.9!4d75.7"
+
+
+def _recorded_place(phone=None, website=None):
+    """A recorded Maps place record with its phone / website slots overwritten."""
+    record = list(next(iter(load_records(FIXTURES).values())))
+    record += [None] * (179 - len(record))
+    record[178] = [[phone]] if phone else None
+    record[7] = [website] if website else None
+    return record
+
+
+def _page(record, **dom):
+    """A PLACE_JS result: the embedded record plus what the rendered page showed."""
+    page = {
+        "embedded": json.dumps(record), "hasTitle": True, "name": record[11], "phoneCandidates": [],
+        "address": None, "website": None, "category": None, "urlName": None, "urlLat": 26.9, "urlLng": 75.7,
+        "loadMs": None, "bytes": 0,
+    }
+    page.update(dom)
+    return page
+
+
+def test_embedded_record_without_phone_takes_the_dom_phone():
+    page = _page(_recorded_place(), phoneCandidates=["Phone: 0141 234 5678"], website="https://mrf.example/")
+    place = place_from_page(page, URL)
+    assert place["source"] == "embedded"
+    assert place["name"] == page["name"]
+    assert place["phone"] == "0141 234 5678"
+    assert place["website"] == "https://mrf.example/"
+
+
+def test_embedded_fields_win_over_the_dom():
+    record = _recorded_place(phone="+91 98290 12345", website="https://embedded.example/")
+    page = _page(record, phoneCandidates=["Phone: 0141 234 5678"], website="https://dom.example/")
+    place = place_from_page(page, URL)
+    assert place["phone"] == "+91 98290 12345"
+    assert place["website"] == "https://embedded.example/"
@@ -0,0 +1,80 @@
+import queue
+import types
+
+import scrape_job
+from job_service import JobControl
+from place_ids import RunSeen
+
+
+class FakeDriver:
+    window_handles = ["main"]
+
+    def __init__(self):
+        self.visited = []
+        self.switch_to = types.SimpleNamespace(window=lambda handle: None)
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script, *args):
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        pass
+
+
+class FakeJournal:
+    def __init__(self):
+        self.queries = []
+
+    def record_query(self, city, keyword):
+        self.queries.append((city, keyword))
+
+
+def _drain(events):
+    out = []
+    while not events.empty():
+        out.append(events.get_nowait())
+    return out
+
+
+def test_run_selenium_processes_every_query(monkeypatch):
+    driver = FakeDriver()
+    monkeypatch.setattr(scrape_job, "setup_driver", lambda lean=False: driver)
+    monkeypatch.setattr(scrape_job, "scroll_feed", lambda driver, feed, on_step=None: {"steps": 2, "seconds": 0.1})
+    monkeypatch.setattr(scrape_job, "harvest_cards", lambda driver: [
+        {"name": f"Card {len(driver.visited)}", "phone": "+91 98290 1234" + str(len(driver.visited)),
+         "url": f"https://www.google.com/maps/place/card{len(driver.visited)}"},
+        {"name": "No phone", "phone": None, "url": f"https://www.google.com/maps/place/page{len(driver.visited)}"},
+    ])
+    monkeypatch.setattr(scrape_job, "extract_in_tabs", lambda driver, urls, **kwargs: [
+        (url, {"name": "Page", "phone": "0141 2345678", "url": url}) for url in urls
+    ])
+
+    events = queue.Queue()
+    job = JobControl("job-test", events)
+    journal = FakeJournal()
+    saved, published = [], []
+    todo = [("MRF dealer Jaipur", "Jaipur", "dealer"), ("MRF dealer Kota", "Kota", "dealer")]
+
+    scrape_job._run_selenium(
+        {"card_mode": True, "lean": False, "detail_tabs": 2}, job, todo,
+        lambda *lead: saved.append(lead), lambda force=False: published.append(force),
+        RunSeen(), None, journal, 0, len(todo),
+    )
+
+    assert [url for url in driver.visited if "/maps/search/" in url] == [
+        "https://www.google.com/maps/search/MRF+dealer+Jaipur", "https://www.google.com/maps/search/MRF+dealer+Kota"
+    ]
+    assert journal.queries == [("Jaipur", "dealer"), ("Kota", "dealer")]
+    assert published == [False, False]
+    assert len(saved) == 4
+    kinds = [(kind, payload) for _, kind, payload in _drain(events)]
+    assert ("progress", (2, 2, "MRF dealer Kota")) in kinds
+    assert not [p for kind, p in kinds if kind == "log" and p["level"] == "warning"]
@@ -0,0 +1,406 @@
+# =====================================================
+# MULTI-PROCESS WORK-STEALING SCHEDULER
+# =====================================================
+# effi.py used to hand each (city, keyword) to one of 4 threads, so one
+# dense query kept a worker busy for minutes while the rest sat idle, and
+# every worker shared one Python process. Here each worker is a process
+# with its own long-lived Chrome, and work is split at two levels:
+#
+#   search queue  - one results feed (a query, or one tile of a city)
+#   detail queue  - one place page
+#
+# Workers pull place pages first and searches only when no page is
+# waiting, so the URLs a dense query produces are spread over every idle
+# worker instead of staying with the one that found them. Results come back
+# over one queue to the coordinator (the job's process), which owns the
+# run-wide state: dedup (RunSeen), tile plans, and the counts that tell it
+# the run is finished. With a WorkerController the coordinator also grows
+# or retires workers while the run goes, instead of keeping a fixed count.
+# hold() / release() stop and restart task pick-up in every worker (pause).
+import itertools
+import multiprocessing as mp
+import queue
+import time
+
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from cdp_capture import MAPS_BASE_URL
+from driver_bootstrap import launch_chrome
+from driver_pool import DriverPool
+from event_log import make_event
+from feed_scroll import scroll_feed
+from geo_tiles import TilePlan, city_bounds
+from lead_index import clean_phone
+from lean_profile import apply_lean_options, enable_lean_blocking, lean_report
+from place_cache import PlaceCache
+from place_extract import extract_place, extraction_summary, harvest_cards, page_stats, page_times, partition_cards
+from run_metrics import PUBLISH_INTERVAL, combine, metrics
+
+DEFAULT_WORKERS = 4
+IDLE_POLL = 0.2  # seconds a worker waits on the search queue before re-checking for pages
+STALL_TIMEOUT = 180  # no result for this long = a task died with its worker; give up
+
+
+# ================= WORKER PROCESS =================
+def setup_worker_driver(lean=False, warm=True):
+    options = Options()
+    # Several windows side by side: fixed size instead of maximized
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    if lean:
+        apply_lean_options(options)
+    driver = launch_chrome(options, warm=warm)
+    if lean:
+        enable_lean_blocking(driver)
+    return driver
+
+
+def _search(driver, task, card_mode):
+    """One results feed -> (place urls, cards that already show a phone)."""
+    with metrics.stage("search_nav"):
+        driver.get(task["url"])
+    try:
+        with metrics.stage("feed_wait"):
+            feed = WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
+        # tiles scroll to the end: a full tile is what triggers a split
+        scroll_feed(driver, feed, max_steps=task["max_steps"])
+    except Exception:
+        # Sometimes Google goes straight to a single result (no feed)
+        pass
+
+    # Any link to a place, not just a.hfpxzc; "!3d" drops navigation links
+    with metrics.stage("link_harvest"):
+        hrefs = [a.get_attribute("href") for a in driver.find_elements(By.XPATH, "//a[contains(@href, '/maps/place/')]")]
+    urls = list(dict.fromkeys(u for u in hrefs if u and "!3d" in u))
+    if not urls and "/maps/place/" in driver.current_url:
+        urls = [driver.current_url]
+
+    complete = partition_cards(harvest_cards(driver), clean_phone)[0] if card_mode else []
+    return urls, complete
+
+
+def _detail(driver, task, cache):
+    place = cache.get(task["url"]) if cache else None
+    if place is None:
+        with metrics.stage("place_nav"):
+            driver.get(task["url"])
+        # Embedded place data first, rendered DOM only if that fails
+        place = extract_place(driver, task["url"])
+        if cache:
+            cache.put(task["url"], place, task["city"])
+    return place
+
+
+def _alive(driver):
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+def _next_task(search_q, detail_q, hold):
+    """Place pages first (from whichever search produced them), then searches; nothing while held."""
+    if hold.is_set():
+        time.sleep(IDLE_POLL)
+        return None
+    try:
+        return detail_q.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        return search_q.get(timeout=IDLE_POLL)
+    except queue.Empty:
+        return None
+
+
+def _worker(worker_id, options, search_q, detail_q, results, stop, retire, hold):
+    """
+    Worker process: one Chrome for its whole life, tasks until `stop` (the run
+    is over) or `retire` (the controller scaled down) is set. Either is only
+    checked between tasks, so a task that was taken is always reported.
+    While `hold` is set the worker takes no new tasks.
+    """
+    cache = PlaceCache(force_refresh=options["force_refresh"]) if options["use_cache"] else None
+    pool = DriverPool(lambda: setup_worker_driver(lean=options["lean"], warm=options["warm"]), max_size=1)
+    commands = 0
+    published = time.monotonic()
+    try:
+        while not (stop.is_set() or retire.is_set()):
+            # A crashed browser ends the lease; the pool hands back a fresh one
+            with pool.lease() as driver:
+                meter = None
+                if options["meter"]:
+                    from benchmarks.wire_meter import WireMeter
+                    meter = WireMeter(driver)
+                while not (stop.is_set() or retire.is_set()):
+                    task = _next_task(search_q, detail_q, hold)
+                    if task is None:
+                        continue
+                    start = time.perf_counter()
+                    try:
+                        if task["kind"] == "search":
+                            outcome = _search(driver, task, options["card_mode"])
+                        else:
+                            outcome = _detail(driver, task, cache)
+                    except Exception as e:
+                        outcome = None
+                        event = make_event(f"⚠️ Worker {worker_id}: {task['kind']} failed ({type(e).__name__})", "warning",
+                                           stage=task["kind"], place=task["url"] if task["kind"] == "detail" else None)
+                        results.put(("log", worker_id, event, None, 0.0))
+                    results.put((task["kind"], worker_id, task, outcome, time.perf_counter() - start))
+                    if time.monotonic() - published > PUBLISH_INTERVAL:
+                        results.put(("metrics", worker_id, metrics.snapshot(), None, 0.0))
+                        published = time.monotonic()
+                    if outcome is None and not _alive(driver):
+                        break
+                if meter:
+                    commands += meter.commands
+                    meter.detach()
+    finally:
+        lines = [extraction_summary(), lean_report(options["lean"], page_stats), pool.summary()]
+        if cache:
+            lines.append(cache.summary())
+        measure = {"page_ms": list(page_times), "commands": commands, "metrics": metrics.snapshot()}
+        results.put(("stats", worker_id, lines, measure, 0.0))
+        if cache:
+            cache.close()
+        pool.close()
+
+
+# ================= COORDINATOR =================
+class WorkScheduler:
+    """
+    scheduler = WorkScheduler(workers=4, lean=True, card_mode=True)
+    # or WorkScheduler(controller=WorkerController(start=4, max_workers=8))
+    for event, payload in scheduler.run(tasks, seen, business_name, tiled=False):
+        ...  # ("lead", row) / ("log", event_log event) /
+             # ("progress", (searches done, searches, pages done, pages))
+    scheduler.reports  # per-worker extraction / lean / pool / place cache summaries
+    scheduler.plans    # tile plans, when tiled
+    scheduler.measures # per-worker place-page load times and (meter=True) WebDriver commands
+    scheduler.stage_metrics()  # per-stage timers of every worker + the coordinator (run_metrics)
+    scheduler.hold() / scheduler.release()  # pause / resume every worker between tasks
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, lean=True, card_mode=True, force_refresh=False,
+                 max_steps=3, max_details=None, controller=None, base_url=MAPS_BASE_URL, use_cache=True, meter=False,
+                 warm=True):
+        self.controller = controller
+        self.workers = controller.start if controller else workers
+        self.options = {"lean": lean, "card_mode": card_mode, "force_refresh": force_refresh,
+                        "use_cache": use_cache, "meter": meter, "warm": warm}
+        self.base_url = base_url
+        self.max_steps = max_steps
+        self.max_details = max_details
+        self.stats = {"searches": 0, "cards": 0, "pages": 0, "stolen": 0, "busy": {}, "alive": {}, "peak": self.workers}
+        self.reports = []
+        self.measures = []
+        self.plans = []
+        self._worker_metrics = {}  # worker id -> latest run_metrics snapshot
+        self._hold = None
+        self._released = 0.0
+
+    def run(self, tasks, seen, business_name, tiled=False):
+        ctx = mp.get_context("spawn")
+        search_q, detail_q, results = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        stop = ctx.Event()
+        self._hold = hold = ctx.Event()
+        active = {}   # worker id -> (process, retire event, started)
+        retired = []  # scaled-down workers finishing their last task
+        worker_ids = itertools.count(1)
+
+        def spawn():
+            worker_id = next(worker_ids)
+            retire = ctx.Event()
+            proc = ctx.Process(target=_worker, args=(worker_id, self.options, search_q, detail_q, results, stop, retire, hold),
+                               name=f"scrape-worker-{worker_id}", daemon=True)
+            proc.start()
+            active[worker_id] = (proc, retire, time.perf_counter())
+
+        def retire_one():
+            # newest first: the oldest workers have the warmest caches
+            worker_id = max(active)
+            proc, retire, since = active.pop(worker_id)
+            retire.set()
+            retired.append(proc)
+            self.stats["alive"][worker_id] = time.perf_counter() - since
+
+        def rescale():
+            target, reason = self.controller.decide(
+                len(active), pending["search"] + pending["detail"], [proc.pid for proc, _, _ in active.values()]
+            )
+            if target is None:
+                return None
+            while len(active) < target:
+                spawn()
+            while len(active) > target:
+                retire_one()
+            self.workers = len(active)
+            self.stats["peak"] = max(self.stats["peak"], self.workers)
+            return reason
+
+        for _ in range(self.workers):
+            spawn()
+
+        pending = {"search": 0, "detail": 0}
+        searches = {}  # search id -> (task, plan, tile); tiles stay here, workers get copies
+        searched_by = {}  # detail url -> worker that found it, to count steals
+        done_searches = 0
+        started = last_result = time.perf_counter()
+
+        def push_search(task, url, plan=None, tile=None, max_steps=self.max_steps):
+            search_id = len(searches)
+            searches[search_id] = (task, plan, tile)
+            search_q.put({"kind": "search", "id": search_id, "url": url, "city": task[1], "max_steps": max_steps})
+            pending["search"] += 1
+
+        def push_tiles(task, plan):
+            tile = plan.next_tile()
+            while tile:
+                push_search(task, tile["url"], plan, tile, max_steps=None)
+                tile = plan.next_tile()
+
+        for task in tasks:
+            query, city, keyword = task
+            bounds = city_bounds(city) if tiled else None
+            if bounds:
+                plan = TilePlan(bounds, f"{business_name} {keyword}", self.base_url)
+                self.plans.append(plan)
+                push_tiles(task, plan)
+            else:
+                push_search(task, f"{self.base_url}/maps/search/{query.replace(' ', '+')}")
+
+        yield "log", make_event(f"⚡ {self.workers} worker processes, {pending['search']} searches queued", stage="scale")
+        try:
+            while pending["search"] or pending["detail"]:
+                if self.controller:
+                    reason = rescale()
+                    if reason:
+                        yield "log", make_event(reason, stage="scale")
+                try:
+                    kind, worker_id, item, outcome, seconds = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(proc.is_alive() for proc, _, _ in active.values()):
+                        yield "log", make_event("❌ All workers exited", "error", stage="scale")
+                        break
+                    if time.perf_counter() - max(last_result, self._released) > STALL_TIMEOUT:
+                        yield "log", make_event(f"⚠️ No results for {STALL_TIMEOUT}s, stopping ({pending['detail']} pages left)",
+                                                "warning", duration=STALL_TIMEOUT)
+                        break
+                    continue
+                last_result = time.perf_counter()
+
+                if kind == "log":
+                    yield "log", item
+                    continue
+                if kind == "metrics":
+                    self._worker_metrics[worker_id] = item
+                    continue
+                if kind == "stats":
+                    # a retired worker signing off
+                    self.reports.extend(f"[worker {worker_id}] {line}" for line in item)
+                    self.measures.append(outcome)
+                    self._worker_metrics[worker_id] = outcome["metrics"]
+                    continue
+                self.stats["busy"][worker_id] = self.stats["busy"].get(worker_id, 0.0) + seconds
+
+                if kind == "search":
+                    pending["search"] -= 1
+                    done_searches += 1
+                    self.stats["searches"] += 1
+                    urls, complete = outcome or ([], [])
+                    task, plan, tile = searches[item["id"]]
+                    query, city, keyword = task
+                    if plan:
+                        urls = plan.record(tile, urls)
+                        push_tiles(task, plan)  # quadrants of a capped tile
+                    # Claim only the cards taken and the pages queued: places past
+                    # max_details stay open to later searches and tiles
+                    fresh = seen.fresh(urls)
+                    card_urls = {card["url"] for card in complete} & set(fresh)
+                    urls = [u for u in fresh if u not in card_urls]
+                    if self.max_details is not None:
+                        urls = urls[:self.max_details]
+                    claimed = set(seen.claim([u for u in fresh if u in card_urls] + urls))
+                    for card in complete:
+                        if card["url"] in card_urls and card["url"] in claimed:
+                            card_urls.discard(card["url"])
+                            self.stats["cards"] += 1
+                            yield "lead", self._row(card["name"], card["phone"], city, keyword, card["url"])
+                    urls = [u for u in urls if u in claimed]
+                    for url in urls:
+                        detail_q.put({"kind": "detail", "url": url, "city": city, "keyword": keyword})
+                        searched_by[url] = worker_id
+                    pending["detail"] += len(urls)
+                    yield "log", make_event(f"✅ Finished: {query} ({len(complete)} from cards, {len(urls)} pages queued)",
+                                            stage="search", query=query, duration=seconds)
+                else:
+                    pending["detail"] -= 1
+                    self.stats["pages"] += 1
+                    if self.controller and outcome:
+                        self.controller.page_done(seconds)
+                    if searched_by.pop(item["url"], worker_id) != worker_id:
+                        self.stats["stolen"] += 1
+                    phone = clean_phone(outcome["phone"]) if outcome else None
+                    if phone:
+                        yield "lead", self._row(outcome["name"], phone, item["city"], item["keyword"], item["url"])
+
+                total_searches = done_searches + pending["search"]
+                yield "progress", (done_searches, total_searches, self.stats["pages"], self.stats["pages"] + pending["detail"])
+        finally:
+            stop.set()
+            now = time.perf_counter()
+            for worker_id, (proc, _, since) in active.items():
+                self.stats["alive"][worker_id] = now - since
+            for proc in [proc for proc, _, _ in active.values()] + retired:
+                proc.join(timeout=30)
+                if proc.is_alive():
+                    proc.terminate()
+            # per-process reports arrive after the stop
+            while True:
+                try:
+                    kind, worker_id, item, outcome, _ = results.get(timeout=0.5)
+                except queue.Empty:
+                    break
+                if kind == "stats":
+                    self.reports.extend(f"[worker {worker_id}] {line}" for line in item)
+                    self.measures.append(outcome)
+                    self._worker_metrics[worker_id] = outcome["metrics"]
+            self.stats["seconds"] = time.perf_counter() - started
+
+    def hold(self):
+        """Workers finish the task they have and take no new one until release()."""
+        if self._hold is not None:
+            self._hold.set()
+
+    def release(self):
+        if self._hold is not None:
+            self._hold.clear()
+        self._released = time.perf_counter()  # time spent held is not a stall
+
+    def stage_metrics(self):
+        return combine(metrics.snapshot(), *self._worker_metrics.values())
+
+    @staticmethod
+    def _row(name, phone, city, keyword, url):
+        return {"Company": name, "Phone": phone, "City": city, "Keyword": keyword, "Source_Link": url}
+
+    def summary(self):
+        s = self.stats
+        seconds = s.get("seconds", 0.0) or 1.0
+        busy = sum(s["busy"].values())
+        # against each worker's own lifetime, since workers come and go
+        utilization = busy / (sum(s["alive"].values()) or seconds * self.workers) * 100
+        workers = f"{self.workers} workers (peak {s['peak']})" if self.controller else f"{self.workers} workers"
+        return (
+            f"🧮 Scheduler: {workers}, {s['searches']} searches, {s['pages']} place pages "
+            f"({s['stolen']} picked up by another worker) | {utilization:.0f}% worker utilization"
+        )
@@ -0,0 +1,181 @@
+# =====================================================
+# ADAPTIVE WORKER-COUNT CONTROLLER
+# =====================================================
+# The right number of Chrome workers depends on the host (free RAM, CPU,
+# steal time on shared VMs) and on how slowly Maps is answering today, so
+# it is measured instead of hardcoded. Every INTERVAL seconds the controller
+# looks at:
+#
+#   memory   - available RAM against what one worker (its Chrome included) uses
+#   cpu      - system CPU busy %, and steal % where the kernel reports it
+#   latency  - median place-page time against the run's own early baseline
+#
+# and moves the worker count one step up or down, within [min, max] and
+# never twice within COOLDOWN seconds. psutil is optional: without it the
+# memory figures come from /proc/meminfo (Linux) and CPU from the load
+# average, and per-worker RSS falls back to RSS_GUESS_MB.
+import os
+import statistics
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+INTERVAL = 10         # seconds between decisions
+COOLDOWN = 30         # seconds after a change before the next one
+RESERVE_MB = 1536     # RAM left for the OS, Streamlit and the coordinator
+RSS_GUESS_MB = 900    # one worker + its Chrome, when it cannot be measured
+CPU_HIGH, CPU_LOW = 90, 70
+STEAL_HIGH = 10
+SLOW, FAST = 2.0, 1.3  # latency p50 vs baseline that counts as slow / healthy
+BASELINE_PAGES = 20   # place pages that set the latency baseline
+WINDOW_PAGES = 30     # recent pages the current latency is taken from
+CACHED_SECONDS = 0.2  # faster than this = served from the place cache, not timed
+
+
+# ================= HOST MEASUREMENTS =================
+def available_mb():
+    if psutil is not None:
+        return psutil.virtual_memory().available / 2**20
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def process_tree_rss_mb(pid):
+    """RSS of a worker process plus its chromedriver / Chrome children."""
+    if psutil is None:
+        return None
+    try:
+        proc = psutil.Process(pid)
+        procs = [proc] + proc.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 2**20
+
+
+def cpu_load():
+    """(busy %, steal % or None) since the previous call."""
+    if psutil is not None:
+        times = psutil.cpu_times_percent(interval=None)
+        return 100 - times.idle, getattr(times, "steal", None)
+    if hasattr(os, "getloadavg"):
+        return min(100.0, os.getloadavg()[0] / (os.cpu_count() or 1) * 100), None
+    return None, None
+
+
+# ================= CONTROLLER =================
+class WorkerController:
+    """
+    controller = WorkerController(start=4, max_workers=8)
+    controller.page_done(seconds)                          # per place page
+    target, reason = controller.decide(active, backlog, pids)
+    # target is None when nothing should change
+    """
+
+    def __init__(self, start=4, min_workers=1, max_workers=8, interval=INTERVAL, cooldown=COOLDOWN):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.start = max(min_workers, min(max_workers, start))
+        self.interval = interval
+        self.cooldown = cooldown
+        self._latencies = []
+        self._baseline = None
+        self._last_check = time.monotonic()
+        self._last_change = 0.0
+        self.changes = []
+        cpu_load()  # psutil measures CPU between calls: prime it
+
+    def page_done(self, seconds):
+        if seconds < CACHED_SECONDS:
+            return
+        self._latencies.append(seconds)
+        if self._baseline is None and len(self._latencies) >= BASELINE_PAGES:
+            self._baseline = statistics.median(self._latencies)
+        del self._latencies[:-WINDOW_PAGES]
+
+    def snapshot(self, pids=()):
+        rss = [r for r in (process_tree_rss_mb(pid) for pid in pids) if r]
+        busy, steal = cpu_load()
+        return {
+            "free_mb": available_mb(),
+            "worker_mb": statistics.mean(rss) if rss else RSS_GUESS_MB,
+            "cpu": busy,
+            "steal": steal,
+            "p50": statistics.median(self._latencies) if self._latencies else None,
+            "baseline": self._baseline,
+        }
+
+    def decide(self, active, backlog, pids=()):
+        """
+        One step up, one step down or (None, None). backlog is the number of
+        queued place pages + searches: no point growing without work waiting.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return None, None
+        self._last_check = now
+        s = self.snapshot(pids)
+
+        shrink = self._shrink_reason(s, active)
+        if shrink and active > self.min_workers:
+            return self._change(active, active - 1, shrink, s, now)
+        if now - self._last_change < self.cooldown:
+            return None, None
+        grow = self._grow_reason(s, active, backlog)
+        if grow and active < self.max_workers:
+            return self._change(active, active + 1, grow, s, now)
+        return None, None
+
+    def _shrink_reason(self, s, active):
+        # Running out of memory is the one thing that cannot wait for the cooldown
+        if s["free_mb"] is not None and s["free_mb"] < RESERVE_MB:
+            return f"only {s['free_mb']:.0f} MB RAM free"
+        if time.monotonic() - self._last_change < self.cooldown:
+            return None
+        if s["cpu"] is not None and s["cpu"] > CPU_HIGH:
+            return f"CPU {s['cpu']:.0f}% busy"
+        if s["steal"] is not None and s["steal"] > STEAL_HIGH:
+            return f"CPU steal {s['steal']:.0f}%"
+        if s["p50"] and s["baseline"] and s["p50"] > SLOW * s["baseline"]:
+            return f"place pages slow ({s['p50']:.1f}s vs {s['baseline']:.1f}s baseline)"
+        return None
+
+    def _grow_reason(self, s, active, backlog):
+        if backlog <= active:
+            return None
+        if s["free_mb"] is not None and s["free_mb"] < RESERVE_MB + 2 * s["worker_mb"]:
+            return None
+        if s["cpu"] is not None and s["cpu"] > CPU_LOW:
+            return None
+        if s["steal"] is not None and s["steal"] > STEAL_HIGH / 2:
+            return None
+        if s["p50"] and s["baseline"] and s["p50"] > FAST * s["baseline"]:
+            return None
+        return f"{backlog} tasks waiting and headroom left"
+
+    def _change(self, active, target, reason, s, now):
+        self._last_change = now
+        details = []
+        if s["free_mb"] is not None:
+            details.append(f"{s['free_mb'] / 1024:.1f} GB free, ~{s['worker_mb']:.0f} MB/worker")
+        if s["cpu"] is not None:
+            details.append(f"CPU {s['cpu']:.0f}%")
+        if s["p50"] is not None:
+            details.append(f"page p50 {s['p50']:.1f}s")
+        message = f"👷 Workers {active} → {target}: {reason} ({', '.join(details)})"
+        self.changes.append(message)
+        return target, message